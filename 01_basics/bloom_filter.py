@@ -0,0 +1,210 @@
+"""
+布隆过滤器（Bloom Filter）：用一点点误判换大量内存的 in 判断。
+
+list_basic.py / tuple_basic.py / set_basic.py 都演示了 x in container：
+    · 列表、元组的 in 是从头到尾逐个比较，O(n)；
+    · 集合的 in 是 O(1)，但每个元素 60 多字节（见 int_set.py），10^8 个键就是 6GB 以上。
+很多场景其实不需要 100% 准确的答案，比如“这个 URL 爬过没有”“这个用户名是不是肯定没被注册”：
+回答“肯定没有”必须准确，回答“可能有”时允许偶尔出错，再去数据库里确认一次就行。
+
+布隆过滤器就是这样一个结构：
+    · 一个 m 位的位数组，初始全是 0；k 个哈希函数；
+    · add(x)：算出 x 的 k 个位置，把这些位都设成 1；
+    · x in bf：k 个位置全是 1 就回答“可能在”，只要有一个是 0 就“肯定不在”——所以只会误报（false positive），不会漏报；
+    · 误报率 p 取决于每个键分到多少位：容量 n、误报率 p 时，最优的 m = -n·ln(p) / (ln 2)^2，k = (m / n)·ln 2。
+      p = 1% 时每个键只要约 9.6 位（1.2 字节），p = 0.1% 时约 14.4 位，和键本身有多长无关。
+实现细节：
+    · 不真的准备 k 个哈希函数，而是用 blake2b 算一次 128 位摘要，拆成两个 64 位整数 h1、h2，
+      第 i 个位置取 (h1 + i·h2) mod m（Kirsch–Mitzenmacher 双重哈希，误报率和 k 个独立哈希几乎一样）；
+      blake2b 的结果和 Python 的 hash() 不同，不随进程的随机种子变化，所以存到文件里、换个进程加载还能用；
+    · update(iterable) 批量添加，contains_many(keys) 批量查询：把属性查找、函数查找提到循环外面；
+    · save(path) 写成“文件头 + 位数组”；load(path) 默认用 mmap 映射位数组，不把整个文件读进内存，
+      几 GB 的过滤器也能秒开，而且多个进程映射同一个文件时共享同一份页缓存。
+"""
+import math
+import mmap
+import struct
+from hashlib import blake2b
+
+_MAGIC = b"BLOOM001"
+_HEADER = struct.Struct("<8sQQQ")  # 魔数、位数 m、哈希个数 k、已添加的键数
+_BIT = tuple(1 << i for i in range(8))
+
+
+def _key_bytes(key):
+    """把键转成 bytes；加一个类型前缀，避免 1 和 "1" 撞成同一个键。"""
+    if isinstance(key, bytes):
+        return b"b" + key
+    if isinstance(key, str):
+        return b"s" + key.encode()
+    if isinstance(key, int):
+        return b"i" + str(key).encode()
+    return b"r" + repr(key).encode()
+
+
+def optimal_params(capacity, error_rate):
+    """容量 capacity、目标误报率 error_rate 下的最优位数 m 和哈希个数 k。"""
+    if not 0 < error_rate < 1:
+        raise ValueError("error_rate 必须在 0 和 1 之间")
+    m = math.ceil(-max(capacity, 1) * math.log(error_rate) / math.log(2) ** 2)
+    k = max(1, round(m / max(capacity, 1) * math.log(2)))
+    return m, k
+
+
+class BloomFilter:
+    """概率型集合：只会误报，不会漏报。"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.m, self.k = optimal_params(capacity, error_rate)
+        self.count = 0
+        self._bits = bytearray((self.m + 7) // 8)
+        self._mmap = None
+
+    def _positions(self, key):
+        digest = blake2b(_key_bytes(key), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1  # 奇数步长，保证 k 个位置不会全挤在同一个点上
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def add(self, key):
+        bits = self._bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= _BIT[pos & 7]
+        self.count += 1
+
+    def update(self, keys):
+        """批量添加（可以是任意迭代器）。"""
+        bits, m, k, bit = self._bits, self.m, self.k, _BIT
+        ks = range(k)
+        added = 0
+        for key in keys:
+            digest = blake2b(_key_bytes(key), digest_size=16).digest()
+            h1 = int.from_bytes(digest[:8], "little")
+            h2 = int.from_bytes(digest[8:], "little") | 1
+            for i in ks:
+                pos = (h1 + i * h2) % m
+                bits[pos >> 3] |= bit[pos & 7]
+            added += 1
+        self.count += added
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[pos >> 3] & _BIT[pos & 7] for pos in self._positions(key))
+
+    def contains_many(self, keys):
+        """批量查询，返回和 keys 一一对应的 bool 列表。"""
+        bits, m, k, bit = self._bits, self.m, self.k, _BIT
+        ks = range(k)
+        result = []
+        append = result.append
+        for key in keys:
+            digest = blake2b(_key_bytes(key), digest_size=16).digest()
+            h1 = int.from_bytes(digest[:8], "little")
+            h2 = int.from_bytes(digest[8:], "little") | 1
+            for i in ks:
+                pos = (h1 + i * h2) % m
+                if not bits[pos >> 3] & bit[pos & 7]:
+                    append(False)
+                    break
+            else:
+                append(True)
+        return result
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+    def expected_error_rate(self):
+        """按已添加的键数估算的当前误报率：(1 - e^(-k·n/m))^k。"""
+        return (1 - math.exp(-self.k * self.count / self.m)) ** self.k
+
+    # --- 存取 ---
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.m, self.k, self.count))
+            f.write(self._bits)
+
+    @classmethod
+    def load(cls, path, use_mmap=True):
+        """从文件加载；use_mmap=True 时位数组是只读的内存映射（之后不能再 add）。"""
+        bf = cls.__new__(cls)
+        with open(path, "rb") as f:
+            magic, bf.m, bf.k, bf.count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} 不是 BloomFilter 文件")
+            if use_mmap:
+                bf._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                bf._bits = memoryview(bf._mmap)[_HEADER.size:]
+            else:
+                bf._mmap = None
+                bf._bits = bytearray(f.read())
+        bf.capacity = bf.count
+        bf.error_rate = bf.expected_error_rate()
+        return bf
+
+    def close(self):
+        if self._mmap is not None:
+            self._bits.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    import time
+
+    def set_nbytes(s):
+        return sys.getsizeof(s) + sum(map(sys.getsizeof, s))
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10**5, 10**6]
+    queries = 200_000
+    for n in sizes:
+        members = [f"user:{i}" for i in range(n)]
+        # 查询一半是成员、一半不是，不是成员的那一半用来测实际误报率
+        outsiders = [f"user:{i}" for i in range(n, n + queries // 2)]
+        probes = members[:queries // 2] + outsiders
+        exact = set(members)
+        print(f"\n--- n = {n}（set 每个键 {set_nbytes(exact) / n:.1f} 字节，含字符串本身）---")
+
+        start = time.perf_counter()
+        hits = [key in exact for key in probes]
+        print(f"{'set':<18} 查询 {queries} 次 {time.perf_counter() - start:.3f}s")
+
+        for error_rate in (0.01, 0.001):
+            bf = BloomFilter(n, error_rate)
+            start = time.perf_counter()
+            bf.update(iter(members))
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            answers = bf.contains_many(probes)
+            query = time.perf_counter() - start
+            missed = sum(1 for h, a in zip(hits, answers) if h and not a)
+            false_pos = sum(1 for h, a in zip(hits, answers) if a and not h)
+            print(f"{f'Bloom(p={error_rate})':<18} 查询 {queries} 次 {query:.3f}s  构建 {build:.2f}s  "
+                  f"每个键 {bf.nbytes / n:.2f} 字节  k={bf.k}  实测误报率 {false_pos / len(outsiders):.4%} "
+                  f"(理论 {bf.expected_error_rate():.4%})  漏报 {missed}")
+
+        # 存盘再用 mmap 加载，查询结果应该完全一样
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "users.bloom")
+            bf.save(path)
+            start = time.perf_counter()
+            with BloomFilter.load(path) as loaded:
+                load_time = time.perf_counter() - start
+                same = loaded.contains_many(probes) == answers
+            print(f"{'save + mmap load':<18} 文件 {os.path.getsize(path) / 1024:.0f} KB, 加载 {load_time * 1e3:.2f}ms, "
+                  f"查询结果一致: {same}")
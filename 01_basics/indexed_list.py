@@ -0,0 +1,318 @@
+"""
+带索引的列表 IndexedList：让 index() 和 count() 不再从头扫一遍。
+
+list_basic.py 里的 my_list.index(35) 和 my_repeated_list.count(2) 都是线性扫描：
+index 从头找到第一个匹配为止，count 每次都要扫完整个列表。在 10^6 个元素的列表上，
+循环里每次都调一次 index / count，整个循环就变成了 O(n^2)。
+
+IndexedList 在列表旁边多维护两份“索引”：
+    · _counts：一个 Counter，值 -> 出现次数。每次增删改都同步加减，永远是准确的。
+      于是 count(x) 和 x in lst 都是 O(1)；index(x) 在 x 根本不存在时也能 O(1) 地直接抛 ValueError。
+    · _positions：值 -> 这个值出现的所有下标（升序列表），index(x) 直接取第一个。
+      难点在于 insert(0, x)、del lst[i] 这类操作会让后面所有元素的下标都挪一位，
+      如果每次都去修正索引，一次 insert 就要改 n 个下标，比 list 自己的 memmove 慢得多。
+      所以这份索引是“惰性”的：只保证 [0, _valid) 这一段前缀的下标是对的。
+        - append / extend / pop() 这些只动末尾的操作，不会挪动任何已有元素，索引增量更新，一直有效；
+        - lst[i] = x 只改一个位置，也不挪动别人，增量更新；
+        - insert / remove / pop(i) / del / 切片赋值 会挪动 i 之后的元素，只把 _valid 缩到 i，什么都不改；
+        - index(x) 先看 x 的第一个下标是否落在有效前缀里，在就直接返回（这是最常见的情况）；
+          不在，就用 list.index 从 _valid 开始往后扫（C 实现，很快）。
+          扫过的元素累计超过“无效部分长度”的若干倍时，才花一次 O(n) 把后半段索引重建——
+          频繁在头部插入、又频繁查询时，成本不会比普通列表高多少；以末尾操作为主时，index 几乎总是 O(1)。
+代价：
+    · 两份索引都要占内存（每个不同的值一个计数、一个下标列表），大约是列表本身的好几倍；
+    · 元素必须可哈希（和 set、dict 的键一样）。
+"""
+from bisect import bisect_left, insort
+from collections import Counter
+
+# 扫描过的元素数超过“无效部分长度”的这么多倍时，重建后半段的下标索引。
+# 重建是 Python 循环，比 list.index 的 C 扫描慢几十倍，所以倍数要取得够大，重建才划算
+_REBUILD_FACTOR = 32
+
+
+class IndexedList:
+    """和 list 一样用的序列，count / in 是 O(1)，index 大多数情况下 O(1)。"""
+
+    __slots__ = ("_items", "_counts", "_positions", "_valid", "_stale", "_scanned")
+
+    def __init__(self, iterable=()):
+        self._items = list(iterable)
+        self._counts = Counter(self._items)
+        self._positions = {}  # 值 -> 升序下标列表，只有 [0, _valid) 里的下标是可信的
+        self._valid = 0  # 下标索引第一次被用到时才建
+        self._stale = False  # 下标列表里是否还留着 >= _valid 的过期下标
+        self._scanned = 0
+
+    # --- 下标索引的维护 ---
+    def _invalidate(self, i):
+        """下标 >= i 的元素被挪动了，索引只保留 [0, i) 这一段。"""
+        if i < self._valid:
+            self._valid = i
+            self._stale = True
+
+    def build_index(self):
+        """立即把下标索引补全（否则要等 index() 扫描得足够多时才会自动重建）。"""
+        if self._valid < len(self._items) or self._stale:
+            self._rebuild_tail()
+
+    def _rebuild_tail(self):
+        valid = self._valid
+        positions = self._positions
+        for value in list(positions):
+            plist = positions[value]
+            cut = bisect_left(plist, valid)
+            if cut == 0:
+                del positions[value]
+            elif cut < len(plist):
+                del plist[cut:]
+        for i, value in enumerate(self._items[valid:], valid):
+            plist = positions.get(value)
+            if plist is None:
+                positions[value] = [i]
+            else:
+                plist.append(i)
+        self._valid = len(self._items)
+        self._stale = False
+        self._scanned = 0
+
+    def _track_append(self, value, i):
+        """在末尾新增了下标 i 的元素。还有过期下标没清理时不能扩大有效前缀，否则过期下标会被当真。"""
+        if self._valid == i and not self._stale:
+            plist = self._positions.get(value)
+            if plist is None:
+                self._positions[value] = [i]
+            else:
+                plist.append(i)
+            self._valid = i + 1
+
+    def _untrack(self, value, i):
+        """下标 i（在有效前缀里）的值 value 被原地替换或删掉了。"""
+        if i < self._valid:
+            plist = self._positions[value]
+            del plist[bisect_left(plist, i)]
+            if not plist:
+                del self._positions[value]
+
+    def _count_out(self, values):
+        counts = self._counts
+        for value in values:
+            counts[value] -= 1
+            if not counts[value]:
+                del counts[value]
+
+    # --- 增 ---
+    def append(self, value):
+        i = len(self._items)
+        self._items.append(value)
+        self._counts[value] += 1
+        self._track_append(value, i)
+
+    def extend(self, iterable):
+        # 先拍一份快照：lst.extend(lst) 时边读边往同一个列表里加，否则永远读不完
+        new = list(iterable)
+        start = len(self._items)
+        self._items.extend(new)
+        self._counts.update(new)
+        if self._valid == start and not self._stale:
+            for i, value in enumerate(new, start):
+                self._track_append(value, i)
+
+    def insert(self, i, value):
+        n = len(self._items)
+        if i < 0:
+            i = max(0, i + n)
+        if i >= n:
+            self.append(value)
+            return
+        self._items.insert(i, value)
+        self._counts[value] += 1
+        self._invalidate(i)
+
+    # --- 删 ---
+    def __delitem__(self, index):
+        n = len(self._items)
+        if isinstance(index, slice):
+            indexes = range(n)[index]
+            if not indexes:
+                return
+            self._count_out([self._items[i] for i in indexes])
+            del self._items[index]
+            self._invalidate(min(indexes[0], indexes[-1]))
+            return
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("list assignment index out of range")
+        value = self._items[index]
+        if index == n - 1:
+            # 删的是最后一个：不挪动任何元素，增量更新索引
+            self._untrack(value, index)
+            if self._valid > index:
+                self._valid = index
+        else:
+            self._invalidate(index)
+        del self._items[index]
+        self._count_out((value,))
+
+    def pop(self, index=-1):
+        if not self._items:
+            raise IndexError("pop from empty list")
+        value = self._items[index]
+        del self[index]
+        return value
+
+    def remove(self, value):
+        del self[self.index(value)]
+
+    def clear(self):
+        self._items.clear()
+        self._counts.clear()
+        self._positions.clear()
+        self._valid = 0
+        self._stale = False
+        self._scanned = 0
+
+    # --- 改 ---
+    def __setitem__(self, index, value):
+        n = len(self._items)
+        if isinstance(index, slice):
+            old = self._items[index]
+            self._items[index] = value
+            self._count_out(old)
+            indexes = range(n)[index]
+            new_count = len(self._items) - n + len(old)
+            if not old and not new_count:
+                # 空切片、也没有插入任何东西：什么都没变（反向的空切片 start 还可能是 -1，不能拿去缩有效前缀）
+                return
+            self._counts.update(self._items[indexes.start:indexes.start + new_count] if indexes.step == 1
+                                else [self._items[i] for i in indexes])
+            self._invalidate(max(0, min(indexes[0], indexes[-1]) if indexes else indexes.start))
+            return
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("list assignment index out of range")
+        old = self._items[index]
+        self._items[index] = value
+        self._count_out((old,))
+        self._counts[value] += 1
+        if index < self._valid:
+            # 原地替换，不挪动别人：从旧值的下标列表里删掉，插进新值的下标列表
+            self._untrack(old, index)
+            insort(self._positions.setdefault(value, []), index)
+
+    # --- 查 ---
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return IndexedList(self._items[index])
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, value):
+        return value in self._counts
+
+    def count(self, value):
+        return self._counts.get(value, 0)
+
+    def index(self, value, start=0, stop=None):
+        n = len(self._items)
+        if stop is None or stop > n:
+            stop = n
+        if start < 0:
+            start = max(0, start + n)
+        if value in self._counts:
+            plist = self._positions.get(value)
+            if plist:
+                j = bisect_left(plist, start)
+                if j < len(plist) and plist[j] < self._valid:
+                    if plist[j] < stop:
+                        return plist[j]
+                    raise ValueError(f"{value!r} is not in list")
+            # 有效前缀里没有：去无效的后半段里找（C 层面的线性扫描），并累计扫描量
+            begin = max(start, self._valid)
+            if begin < stop:
+                try:
+                    found = self._items.index(value, begin, stop)
+                except ValueError:
+                    found = None
+                self._scanned += (found if found is not None else stop) - begin
+                if self._scanned > _REBUILD_FACTOR * (n - self._valid):
+                    self._rebuild_tail()
+                if found is not None:
+                    return found
+        raise ValueError(f"{value!r} is not in list")
+
+    def __eq__(self, other):
+        if isinstance(other, IndexedList):
+            return self._items == other._items
+        if isinstance(other, list):
+            return self._items == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"IndexedList({self._items!r})"
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    my_list = IndexedList([10, 20, 30, 40, 50])
+    my_list.append(60)
+    my_list.insert(1, 15)
+    my_list.extend([70, 80])
+    del my_list[0]
+    del my_list[4:6]
+    my_list.remove(15)
+    popped = my_list.pop()
+    my_list[0] = 25
+    my_list[1:3] = [35, 45]
+    print(f"按 list_basic.py 的顺序操作之后: {my_list}, pop 出来的是 {popped}")
+    print(f"35 的索引: {my_list.index(35)}, 25 在列表中: {25 in my_list}")
+    my_repeated_list = IndexedList([1, 2, 2, 3, 1, 4, 2])
+    print(f"元素 2 出现的次数: {my_repeated_list.count(2)}, 元素 5 出现的次数: {my_repeated_list.count(5)}")
+
+    # 基准：10^6 个元素，每轮做一次某种修改，再查一次 index 和 count
+    n, rounds = 10**6, 200
+    rng = random.Random(0)
+    queries = [rng.randrange(n) for _ in range(rounds)]
+    mutations = [
+        ("append", lambda lst, k: lst.append(n + k)),
+        ("extend", lambda lst, k: lst.extend([n + k, n + k + 1])),
+        ("pop()", lambda lst, k: lst.pop()),
+        ("lst[i] = x", lambda lst, k: lst.__setitem__(queries[k] // 2, -k)),
+        ("insert(1, x)", lambda lst, k: lst.insert(1, -k)),
+        ("pop(i)", lambda lst, k: lst.pop(n // 2)),
+        ("remove(x)", lambda lst, k: lst.remove(k)),
+        ("del lst[i:j]", lambda lst, k: lst.__delitem__(slice(n // 2, n // 2 + 3))),
+        ("lst[i:j] = [...]", lambda lst, k: lst.__setitem__(slice(n // 3, n // 3 + 2), [-k, -k, -k])),
+    ]
+
+    def bench(make, mutate):
+        lst = make(range(n))
+        if isinstance(lst, IndexedList):
+            lst.build_index()  # 初始建索引的时间单独算，不摊到每一轮里
+        start = time.perf_counter()
+        for k in range(rounds):
+            mutate(lst, k)
+            value = queries[k]
+            if value in lst:
+                lst.index(value)
+            lst.count(value)
+        return (time.perf_counter() - start) / rounds * 1e3, lst
+
+    start = time.perf_counter()
+    IndexedList(range(n)).build_index()
+    print(f"\n--- n = {n}：IndexedList 构建 + 建索引 {time.perf_counter() - start:.2f}s ---")
+    print("每轮一次修改 + 一次 index + 一次 count（ms/轮）：")
+    print(f"{'修改操作':<18} {'list':>10} {'IndexedList':>12}  结果一致")
+    for name, mutate in mutations:
+        t_list, plain = bench(list, mutate)
+        t_indexed, indexed = bench(IndexedList, mutate)
+        print(f"{name:<18} {t_list:>10.3f} {t_indexed:>12.3f}  {indexed == plain}")
@@ -0,0 +1,472 @@
+"""
+紧凑整数集合 IntSet：set_basic.py 里的集合运算，换一种存法。
+
+Python 的 set 里每个整数都是一个独立的 int 对象（28 字节），再加上哈希表的槽位（每个约 16~32 字节，
+而且表永远留着空位），平均每个元素 60 多字节；并集、交集也要逐个元素算哈希、查表。
+几千万个用户 ID 的集合，光存就要好几个 GB。
+
+IntSet 借鉴 Roaring Bitmap 的做法，只存非负整数：
+    · 把整数 x 拆成高位 x >> 16 和低 16 位 x & 0xFFFF，高位相同的元素放在同一个“容器”里，
+      每个容器最多装 65536 个不同的低位；容器放在字典里，键是高位；
+    · 元素少（≤ 4096 个）的容器用排好序的 array('H')，每个元素只占 2 字节；
+    · 元素多的容器用位图：8192 字节的 bytearray，第 k 位是 1 表示低位 k 在集合里，每个元素只占 1 位。
+      4096 个元素时两种存法正好都是 8KB，这就是分界点；
+    · 位图之间的并、交、差、对称差，先把 bytearray 转成一个 65536 位的 Python int，再直接用 | & ^ 运算：
+      CPython 的大整数运算在 C 里按 30 位一个“字”逐字处理，一次指令就处理 30 个元素（字并行，word-parallel）；
+    · 小容器（array）之间的运算是“小的那个逐个去查大的那个”，只在最多 4096 个元素的范围里做哈希；
+      小容器和位图之间直接查位。运算结果再按元素个数选 array 还是位图。
+所以内存大约是每个元素 2 字节（稀疏）到 1/8 字节（稠密），集合运算的速度和容器数量而不是元素数量成正比（稠密时）。
+
+支持的操作和 set_basic.py 一样：add / update / remove / discard / pop / clear，
+union / intersection / difference / symmetric_difference（以及 | & - ^），
+issubset / issuperset / isdisjoint（以及 <= >=），in、len、for（按从小到大的顺序）。
+
+用法：
+    python int_set.py                      # 10^4 ~ 10^7 个元素，和内置 set 对比
+    python int_set.py 100000000            # 10^8：内置 set 要 6GB 以上内存，这个规模只测 IntSet
+"""
+import sys
+from array import array
+from bisect import bisect_left
+
+_ARRAY_MAX = 4096  # 容器元素个数超过它就换成位图
+_BITMAP_BYTES = 65536 // 8
+_BIT = tuple(1 << i for i in range(8))
+_BYTE_BITS = tuple(tuple(i for i in range(8) if b >> i & 1) for b in range(256))  # 每个字节值里哪几位是 1
+
+
+# --- 容器工具：容器是 array('H')（稀疏）或 bytearray 位图（稠密） ---
+def _bitmap_from_lows(lows):
+    bitmap = bytearray(_BITMAP_BYTES)
+    for x in lows:
+        bitmap[x >> 3] |= _BIT[x & 7]
+    return bitmap
+
+
+def _lows_from_bitmap(bitmap):
+    return array("H", [i << 3 | bit for i, byte in enumerate(bitmap) if byte for bit in _BYTE_BITS[byte]])
+
+
+def _to_int(container):
+    if type(container) is bytearray:
+        return int.from_bytes(container, "little")
+    return int.from_bytes(_bitmap_from_lows(container), "little")
+
+
+def _from_int(value):
+    """位运算的结果（一个 65536 位的 int）转回合适的容器；空了返回 None。"""
+    count = value.bit_count()
+    if count == 0:
+        return None
+    bitmap = bytearray(value.to_bytes(_BITMAP_BYTES, "little"))
+    return _lows_from_bitmap(bitmap) if count <= _ARRAY_MAX else bitmap
+
+
+def _from_lows(lows):
+    """一串已排序、不重复的低位转成合适的容器；空了返回 None。"""
+    if not lows:
+        return None
+    return array("H", lows) if len(lows) <= _ARRAY_MAX else _bitmap_from_lows(lows)
+
+
+def _card(container):
+    if type(container) is bytearray:
+        return int.from_bytes(container, "little").bit_count()
+    return len(container)
+
+
+def _has(container, low):
+    if type(container) is bytearray:
+        return container[low >> 3] & _BIT[low & 7]
+    i = bisect_left(container, low)
+    return i < len(container) and container[i] == low
+
+
+def _and(a, b):
+    if type(a) is array and type(b) is array:
+        if len(a) > len(b):
+            a, b = b, a
+        lookup = set(b)
+        return _from_lows([x for x in a if x in lookup])  # 遍历的是已排序的 a，结果自然有序
+    if type(a) is array or type(b) is array:
+        small, bitmap = (a, b) if type(a) is array else (b, a)
+        return _from_lows([x for x in small if bitmap[x >> 3] & _BIT[x & 7]])
+    return _from_int(_to_int(a) & _to_int(b))
+
+
+def _or(a, b):
+    if type(a) is array and type(b) is array and len(a) + len(b) <= _ARRAY_MAX:
+        return _from_lows(sorted(set(a).union(b)))
+    return _from_int(_to_int(a) | _to_int(b))
+
+
+def _sub(a, b):
+    if type(a) is array:
+        if type(b) is array:
+            lookup = set(b)
+            return _from_lows([x for x in a if x not in lookup])
+        return _from_lows([x for x in a if not b[x >> 3] & _BIT[x & 7]])
+    return _from_int(_to_int(a) & ~_to_int(b))
+
+
+def _xor(a, b):
+    if type(a) is array and type(b) is array and len(a) + len(b) <= _ARRAY_MAX:
+        return _from_lows(sorted(set(a).symmetric_difference(b)))
+    return _from_int(_to_int(a) ^ _to_int(b))
+
+
+def _iter_container(base, container):
+    if type(container) is array:
+        for x in container:
+            yield base | x
+    else:
+        for i, byte in enumerate(container):
+            if byte:
+                for bit in _BYTE_BITS[byte]:
+                    yield base | i << 3 | bit
+
+
+class IntSet:
+    """非负整数的紧凑集合，API 和 set 一致。"""
+
+    __slots__ = ("_containers", "_cards", "_len")
+
+    def __init__(self, iterable=()):
+        self._containers = {}  # 高位 -> 容器
+        self._cards = {}  # 高位 -> 容器里的元素个数，删除时不用为了“空了没有”去扫整个位图
+        self._len = 0
+        if isinstance(iterable, range) and iterable.step == 1:
+            self._add_range(iterable.start, iterable.stop)
+        else:
+            self.update(iterable)
+
+    @classmethod
+    def _wrap(cls, containers):
+        s = cls.__new__(cls)
+        s._containers = containers
+        s._cards = {high: _card(c) for high, c in containers.items()}
+        s._len = sum(s._cards.values())
+        return s
+
+    def _add_range(self, start, stop):
+        """连续区间直接按容器整块填满，不逐个元素处理。"""
+        if start < 0:
+            raise ValueError("IntSet 只能存放非负整数")
+        full = (1 << 65536) - 1
+        while start < stop:
+            high, low = start >> 16, start & 0xFFFF
+            end = min(stop, (high + 1) << 16)
+            span = ((1 << (end - start)) - 1) << low
+            existing = self._containers.get(high)
+            value = span if existing is None else span | _to_int(existing)
+            container = _from_int(value) if value != full else bytearray(b"\xff" * _BITMAP_BYTES)
+            count = _card(container)
+            self._len += count - self._cards.get(high, 0)
+            self._containers[high] = container
+            self._cards[high] = count
+            start = end
+
+    # --- 增删：和 set_basic.py 一样的名字 ---
+    def add(self, x):
+        if x < 0:
+            raise ValueError("IntSet 只能存放非负整数")
+        high, low = x >> 16, x & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            self._containers[high] = array("H", [low])
+            self._cards[high] = 0
+        elif type(container) is bytearray:
+            if container[low >> 3] & _BIT[low & 7]:
+                return
+            container[low >> 3] |= _BIT[low & 7]
+        else:
+            i = bisect_left(container, low)
+            if i < len(container) and container[i] == low:
+                return
+            container.insert(i, low)
+            if len(container) > _ARRAY_MAX:
+                self._containers[high] = _bitmap_from_lows(container)
+        self._cards[high] += 1
+        self._len += 1
+
+    def update(self, *iterables):
+        # 先按高位分组，每组一次性建容器（或合并进已有容器），比逐个 add 快得多
+        for iterable in iterables:
+            if isinstance(iterable, IntSet):
+                merged = self | iterable
+                self._containers, self._cards, self._len = merged._containers, merged._cards, merged._len
+                continue
+            groups = {}
+            for x in iterable:
+                if x < 0:
+                    raise ValueError("IntSet 只能存放非负整数")
+                group = groups.get(x >> 16)
+                if group is None:
+                    groups[x >> 16] = [x & 0xFFFF]
+                else:
+                    group.append(x & 0xFFFF)
+            for high, lows in groups.items():
+                if len(lows) > _ARRAY_MAX:
+                    new = _from_int(int.from_bytes(_bitmap_from_lows(lows), "little"))
+                else:
+                    new = array("H", sorted(set(lows)))
+                existing = self._containers.get(high)
+                if existing is not None:
+                    new = _or(existing, new)
+                count = _card(new)
+                self._len += count - self._cards.get(high, 0)
+                self._containers[high] = new
+                self._cards[high] = count
+
+    def discard(self, x):
+        if not isinstance(x, int) or x < 0:
+            return
+        high, low = x >> 16, x & 0xFFFF
+        container = self._containers.get(high)
+        if container is None or not _has(container, low):
+            return
+        if type(container) is bytearray:
+            container[low >> 3] &= ~_BIT[low & 7]
+        else:
+            del container[bisect_left(container, low)]
+        self._remove_one(high)
+
+    def _remove_one(self, high):
+        """容器 high 里刚删掉一个元素：更新计数，空了就把容器删掉。"""
+        self._cards[high] -= 1
+        if not self._cards[high]:
+            del self._containers[high], self._cards[high]
+        self._len -= 1
+
+    def remove(self, x):
+        if x not in self:
+            raise KeyError(x)
+        self.discard(x)
+
+    def pop(self):
+        """
+        删除并返回最大的元素（set.pop 返回的是任意一个）。
+        从高位最大的容器末尾取：array 直接 pop 最后一个，位图找最后一个非零字节，都不用排序、不用遍历整个集合。
+        """
+        if not self._len:
+            raise KeyError("pop from an empty IntSet")
+        high = max(self._containers)
+        container = self._containers[high]
+        if type(container) is bytearray:
+            i = len(container.rstrip(b"\0")) - 1
+            low = i << 3 | _BYTE_BITS[container[i]][-1]
+            container[i] &= ~_BIT[low & 7]
+        else:
+            low = container.pop()
+        self._remove_one(high)
+        return high << 16 | low
+
+    def clear(self):
+        self._containers.clear()
+        self._cards.clear()
+        self._len = 0
+
+    def copy(self):
+        # array 和 bytearray 的 [:] 都是浅复制
+        s = self.__class__.__new__(self.__class__)
+        s._containers = {high: c[:] for high, c in self._containers.items()}
+        s._cards = self._cards.copy()
+        s._len = self._len
+        return s
+
+    # --- 查询 ---
+    def __contains__(self, x):
+        # 热点路径：把 _has 展开写在这里，少一次函数调用
+        try:
+            container = self._containers.get(x >> 16) if x >= 0 else None
+        except TypeError:
+            return False  # 和 set 一样：不在集合里就是 False，哪怕类型对不上（比如 "a" in IntSet()）
+        if container is None:
+            return False
+        low = x & 0xFFFF
+        if type(container) is bytearray:
+            return bool(container[low >> 3] & _BIT[low & 7])
+        i = bisect_left(container, low)
+        return i < len(container) and container[i] == low
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for high in sorted(self._containers):
+            yield from _iter_container(high << 16, self._containers[high])
+
+    def nbytes(self):
+        """容器本身占用的字节数（加上字典和对象头）。"""
+        return sys.getsizeof(self._containers) + sum(sys.getsizeof(c) for c in self._containers.values())
+
+    # --- 集合运算：逐个容器配对计算 ---
+    def _combine(self, other, op, keep_self_only, keep_other_only):
+        if not isinstance(other, IntSet):
+            other = IntSet(other)
+        a, b = self._containers, other._containers
+        result = {}
+        for high, container in a.items():
+            partner = b.get(high)
+            if partner is not None:
+                merged = op(container, partner)
+                if merged is not None:
+                    result[high] = merged
+            elif keep_self_only:
+                result[high] = container[:]
+        if keep_other_only:
+            for high, container in b.items():
+                if high not in a:
+                    result[high] = container[:]
+        return self._wrap(result)
+
+    def union(self, *others):
+        result = self
+        for other in others:
+            result = result._combine(other, _or, True, True)
+        return result if others else self.copy()
+
+    def intersection(self, *others):
+        result = self
+        for other in others:
+            result = result._combine(other, _and, False, False)
+        return result if others else self.copy()
+
+    def difference(self, *others):
+        result = self
+        for other in others:
+            result = result._combine(other, _sub, True, False)
+        return result if others else self.copy()
+
+    def symmetric_difference(self, other):
+        return self._combine(other, _xor, True, True)
+
+    def issubset(self, other):
+        if not isinstance(other, IntSet):
+            other = IntSet(other)
+        if self._len > other._len:
+            return False
+        for high, container in self._containers.items():
+            partner = other._containers.get(high)
+            if partner is None or _sub(container, partner) is not None:
+                return False
+        return True
+
+    def issuperset(self, other):
+        if not isinstance(other, IntSet):
+            other = IntSet(other)
+        return other.issubset(self)
+
+    def isdisjoint(self, other):
+        if not isinstance(other, IntSet):
+            other = IntSet(other)
+        for high, container in self._containers.items():
+            partner = other._containers.get(high)
+            if partner is not None and _and(container, partner) is not None:
+                return False
+        return True
+
+    def __or__(self, other):
+        return self.union(other) if isinstance(other, IntSet) else NotImplemented
+
+    def __and__(self, other):
+        return self.intersection(other) if isinstance(other, IntSet) else NotImplemented
+
+    def __sub__(self, other):
+        return self.difference(other) if isinstance(other, IntSet) else NotImplemented
+
+    def __xor__(self, other):
+        return self.symmetric_difference(other) if isinstance(other, IntSet) else NotImplemented
+
+    def __le__(self, other):
+        return self.issubset(other) if isinstance(other, IntSet) else NotImplemented
+
+    def __ge__(self, other):
+        return self.issuperset(other) if isinstance(other, IntSet) else NotImplemented
+
+    def __eq__(self, other):
+        if not isinstance(other, IntSet):
+            return NotImplemented
+        if self._len != other._len or self._containers.keys() != other._containers.keys():
+            return False
+        return all(_xor(c, other._containers[high]) is None for high, c in self._containers.items())
+
+    __hash__ = None  # 和 set 一样可变、不可哈希
+
+    def __repr__(self):
+        if self._len > 20:
+            head = ", ".join(map(str, _first(self, 10)))
+            return f"IntSet({{{head}, ...}}, len={self._len})"
+        return f"IntSet({{{', '.join(map(str, self))}}})"
+
+
+def _first(iterable, n):
+    result = []
+    for x in iterable:
+        if len(result) == n:
+            break
+        result.append(x)
+    return result
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    set_a = IntSet({1, 2, 3, 4, 5})
+    set_b = IntSet({4, 5, 6, 7, 8})
+    print(f"A = {set_a}, B = {set_b}")
+    print(f"并集 A | B: {set_a | set_b}")
+    print(f"交集 A & B: {set_a & set_b}")
+    print(f"差集 A - B: {set_a - set_b}, B - A: {set_b - set_a}")
+    print(f"对称差集 A ^ B: {set_a ^ set_b}")
+    print(f"{{1, 2}} 是 A 的子集: {IntSet({1, 2}).issubset(set_a)}, A 和 {{10, 11}} 不相交: {set_a.isdisjoint({10, 11})}")
+
+    def timed(func):
+        start = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - start
+
+    def set_nbytes(s):
+        return sys.getsizeof(s) + sum(map(sys.getsizeof, s))
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10**4, 10**5, 10**6, 10**7]
+    max_builtin = 2 * 10**7  # 再大的内置 set 在一般机器上放不下，只测 IntSet
+    for n in sizes:
+        # 两个 ID 集合：各 n 个，取值范围 4n（密度 1/4，容器以位图为主），约一半重叠
+        rng = random.Random(n)
+        use_builtin = n <= max_builtin
+        if use_builtin:
+            ids_a = rng.sample(range(4 * n), n)
+            ids_b = rng.sample(range(2 * n, 6 * n), n)
+        else:
+            # 不生成 n 个元素的列表（10^8 个 int 的列表本身就要 4GB），直接边生成边放进 IntSet（允许少量重复）
+            ids_a = (rng.randrange(4 * n) for _ in range(n))
+            ids_b = (rng.randrange(2 * n, 6 * n) for _ in range(n))
+        ia, t_build = timed(lambda: IntSet(ids_a))
+        ib = IntSet(ids_b)
+        print(f"\n--- n = {n}（IntSet 构建 {t_build:.2f}s）---")
+        if use_builtin:
+            sa, sb = set(ids_a), set(ids_b)
+            print(f"{'内存':<22} set {set_nbytes(sa) / n:7.1f} 字节/元素    IntSet {ia.nbytes() / n:7.2f} 字节/元素")
+        else:
+            print(f"{'内存':<22} {'':>22}    IntSet {ia.nbytes() / n:7.2f} 字节/元素")
+        del ids_a, ids_b
+        probes = [rng.randrange(4 * n) for _ in range(100_000)]
+        cases = [
+            ("union", lambda s, t: s.union(t)),
+            ("intersection", lambda s, t: s.intersection(t)),
+            ("difference", lambda s, t: s.difference(t)),
+            ("symmetric_difference", lambda s, t: s.symmetric_difference(t)),
+            ("issubset", lambda s, t: s.issubset(t)),
+            ("isdisjoint", lambda s, t: s.isdisjoint(t)),
+            ("in (10^5 次)", lambda s, t: sum(1 for x in probes if x in s)),
+        ]
+        for name, op in cases:
+            r_int, t_int = timed(lambda: op(ia, ib))
+            if use_builtin:
+                r_set, t_set = timed(lambda: op(sa, sb))
+                same = (len(r_int) == len(r_set)) if isinstance(r_set, set) else r_int == r_set
+                print(f"{name:<22} set {t_set * 1e3:9.2f}ms    IntSet {t_int * 1e3:9.2f}ms    结果一致: {same}")
+            else:
+                print(f"{name:<22} {'':>17}    IntSet {t_int * 1e3:9.2f}ms")
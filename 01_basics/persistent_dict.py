@@ -0,0 +1,346 @@
+"""
+持久化字典（HAMT）：不用整份复制就能得到“改过的新版本”的不可变字典。
+
+dict_basic.py 里的增删改都是原地修改。如果要保留修改前的快照（比如每个请求看到一份一致的状态，
+或者想随时回滚到上一个版本），常见的写法是先复制再改：
+    new_state = dict(state)
+    new_state.update(changes)
+dict(state) 要复制整张哈希表，n 个键就是 O(n)。状态有几十万个键、每秒要更新几千次时，时间全花在复制上了。
+
+HAMT（Hash Array Mapped Trie，哈希数组映射前缀树）是 Clojure、Scala 以及 Python 自己的 contextvars 用的结构：
+    · 把键的 64 位哈希值每 5 位切成一段，第 1 段决定在根节点的 32 个槽里选哪个，第 2 段决定下一层……
+      和 persistent_tuple.py 一样是一棵 32 叉树，100 万个键大约 4 层；
+    · 节点不真的开 32 个槽，而是用一个 32 位的 bitmap 记录哪些槽有东西，再用一个紧凑的列表只存有东西的槽。
+      槽 b 在列表里的位置 = bitmap 中比 b 低的位有几个 1（popcount），所以稀疏节点也不浪费内存；
+    · 槽里要么直接是一个键值对 (hash, key, value)，要么是下一层节点；两个键在某一层撞到同一个槽时才往下分叉；
+      64 位哈希值完全相同（真正的冲突）的键放进一个 _CollisionNode，里面线性查找；
+    · set / delete 只复制从根到目标这一条路径上的节点，O(log n)，其余节点和旧版本共享；
+    · update / 构造函数一次写入很多键时，用 Clojure 的 transient 技巧：这一批操作新建的节点打上同一个 edit 标记，
+      同一批里再次修改它们时直接原地改，不再复制——这些节点只有新版本能看到，原地改是安全的。
+
+读取 API 和 dict 一样：d[key]、d.get(key, default)、key in d、len(d)、keys() / values() / items() 视图、for k in d。
+"""
+from collections.abc import ItemsView, Mapping, ValuesView
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_MASK = (1 << 64) - 1
+_NOT_FOUND = object()
+
+
+def _hash(key):
+    return hash(key) & _HASH_MASK
+
+
+class _BitmapNode:
+    """entries 里每一项是键值对 (hash, key, value)，或者下一层的节点。"""
+
+    __slots__ = ("bitmap", "entries", "edit")
+
+    def __init__(self, bitmap, entries, edit=None):
+        self.bitmap = bitmap
+        self.entries = entries
+        self.edit = edit
+
+
+class _CollisionNode:
+    """哈希值完全相同的几个键值对。"""
+
+    __slots__ = ("hash", "entries", "edit")
+
+    def __init__(self, h, entries, edit=None):
+        self.hash = h
+        self.entries = entries
+        self.edit = edit
+
+
+_EMPTY = _BitmapNode(0, [])
+
+
+def _pair_node(shift, a, b, edit):
+    """两个哈希值不同（或相同）的键值对 a、b 第一次撞到同一个槽时，为它们建一个下一层节点。"""
+    if a[0] == b[0]:
+        return _CollisionNode(a[0], [a, b], edit)
+    bit_a = 1 << ((a[0] >> shift) & _MASK)
+    bit_b = 1 << ((b[0] >> shift) & _MASK)
+    if bit_a == bit_b:
+        return _BitmapNode(bit_a, [_pair_node(shift + _BITS, a, b, edit)], edit)
+    return _BitmapNode(bit_a | bit_b, [a, b] if bit_a < bit_b else [b, a], edit)
+
+
+def _assoc(node, edit, shift, h, key, value):
+    """返回 (新节点, 是否新增了一个键)。edit 不为 None 时，带同一个 edit 标记的节点可以原地修改。"""
+    owned = edit is not None and node.edit is edit
+
+    if type(node) is _CollisionNode:
+        if h != node.hash:
+            # 新键的哈希不同：把冲突节点挂到一个普通节点下面，再插入
+            wrapper = _BitmapNode(1 << ((node.hash >> shift) & _MASK), [node], edit)
+            return _assoc(wrapper, edit, shift, h, key, value)
+        entries = node.entries if owned else list(node.entries)
+        for i, (_, k, _) in enumerate(entries):
+            if k is key or k == key:
+                entries[i] = (h, key, value)
+                added = False
+                break
+        else:
+            entries.append((h, key, value))
+            added = True
+        return (node if owned else _CollisionNode(h, entries, edit)), added
+
+    bit = 1 << ((h >> shift) & _MASK)
+    idx = (node.bitmap & (bit - 1)).bit_count()
+    if not node.bitmap & bit:
+        if owned:
+            node.entries.insert(idx, (h, key, value))
+            node.bitmap |= bit
+            return node, True
+        entries = node.entries[:idx]
+        entries.append((h, key, value))
+        entries += node.entries[idx:]
+        return _BitmapNode(node.bitmap | bit, entries, edit), True
+
+    entry = node.entries[idx]
+    if type(entry) is tuple:
+        if entry[0] == h and (entry[1] is key or entry[1] == key):
+            if entry[2] is value:
+                return node, False
+            new_entry, added = (h, key, value), False
+        else:
+            new_entry, added = _pair_node(shift + _BITS, entry, (h, key, value), edit), True
+    else:
+        new_entry, added = _assoc(entry, edit, shift + _BITS, h, key, value)
+        if new_entry is entry:
+            return node, added
+    if owned:
+        node.entries[idx] = new_entry
+        return node, added
+    entries = list(node.entries)
+    entries[idx] = new_entry
+    return _BitmapNode(node.bitmap, entries, edit), added
+
+
+def _dissoc(node, shift, h, key):
+    """
+    返回删掉 key 之后的节点；key 不存在时返回 _NOT_FOUND。
+    节点空了返回 None；节点只剩一个键值对时直接返回这个键值对，由上一层把它“提”上去，保持树尽量矮。
+    """
+    if type(node) is _CollisionNode:
+        for i, (_, k, _) in enumerate(node.entries):
+            if k is key or k == key:
+                entries = node.entries[:i] + node.entries[i + 1:]
+                return entries[0] if len(entries) == 1 else _CollisionNode(node.hash, entries)
+        return _NOT_FOUND
+
+    bit = 1 << ((h >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return _NOT_FOUND
+    idx = (node.bitmap & (bit - 1)).bit_count()
+    entry = node.entries[idx]
+    if type(entry) is tuple:
+        if not (entry[0] == h and (entry[1] is key or entry[1] == key)):
+            return _NOT_FOUND
+        new_entry = None
+    else:
+        new_entry = _dissoc(entry, shift + _BITS, h, key)
+        if new_entry is _NOT_FOUND:
+            return _NOT_FOUND
+
+    if new_entry is None:
+        if node.bitmap == bit:
+            return None
+        entries = node.entries[:idx] + node.entries[idx + 1:]
+        bitmap = node.bitmap ^ bit
+    else:
+        entries = list(node.entries)
+        entries[idx] = new_entry
+        bitmap = node.bitmap
+    if len(entries) == 1 and type(entries[0]) is tuple:
+        return entries[0]
+    return _BitmapNode(bitmap, entries)
+
+
+def _iter_entries(node):
+    for entry in node.entries:
+        if type(entry) is tuple:
+            yield entry
+        else:
+            yield from _iter_entries(entry)
+
+
+class _ItemsView(ItemsView):
+    # Mapping 默认的 ItemsView 遍历时对每个键再查一次 self[key]，这里直接从树里读出键值对
+    def __iter__(self):
+        return ((key, value) for _, key, value in _iter_entries(self._mapping._root))
+
+
+class _ValuesView(ValuesView):
+    def __iter__(self):
+        return (value for _, _, value in _iter_entries(self._mapping._root))
+
+
+class PersistentDict(Mapping):
+    """不可变字典；set / delete / update 返回新版本，O(log n)，和旧版本共享结构。"""
+
+    __slots__ = ("_root", "_len")
+
+    def __init__(self, mapping=(), **kwargs):
+        self._root, self._len = _EMPTY, 0
+        self._root, self._len = self._bulk_assoc(mapping, kwargs)
+
+    @classmethod
+    def _wrap(cls, root, length):
+        d = cls.__new__(cls)
+        d._root = root
+        d._len = length
+        return d
+
+    def _bulk_assoc(self, mapping, kwargs):
+        edit = object()  # 这一批操作专用的标记，用完就丢，之后没有人能再原地修改这些节点
+        root, length = self._root, self._len
+        items = mapping.items() if isinstance(mapping, Mapping) else mapping
+        for key, value in items:
+            root, added = _assoc(root, edit, 0, _hash(key), key, value)
+            length += added
+        for key, value in kwargs.items():
+            root, added = _assoc(root, edit, 0, _hash(key), key, value)
+            length += added
+        return root, length
+
+    # --- 读取：和 dict 一样 ---
+    def _lookup(self, key, default):
+        h = _hash(key)
+        node = self._root
+        shift = 0
+        while True:
+            if type(node) is _CollisionNode:
+                for _, k, v in node.entries:
+                    if k is key or k == key:
+                        return v
+                return default
+            bit = 1 << ((h >> shift) & _MASK)
+            if not node.bitmap & bit:
+                return default
+            entry = node.entries[(node.bitmap & (bit - 1)).bit_count()]
+            if type(entry) is tuple:
+                return entry[2] if entry[0] == h and (entry[1] is key or entry[1] == key) else default
+            node = entry
+            shift += _BITS
+
+    def __getitem__(self, key):
+        value = self._lookup(key, _NOT_FOUND)
+        if value is _NOT_FOUND:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        return self._lookup(key, default)
+
+    def __contains__(self, key):
+        return self._lookup(key, _NOT_FOUND) is not _NOT_FOUND
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return (key for _, key, _ in _iter_entries(self._root))
+
+    def items(self):
+        return _ItemsView(self)
+
+    def values(self):
+        return _ValuesView(self)
+
+    # --- 写入：返回新版本 ---
+    def set(self, key, value):
+        root, added = _assoc(self._root, None, 0, _hash(key), key, value)
+        return self if root is self._root else self._wrap(root, self._len + added)
+
+    def delete(self, key):
+        """返回删掉 key 的新版本；key 不存在时抛 KeyError（和 del d[key] 一样）。"""
+        root = _dissoc(self._root, 0, _hash(key), key)
+        if root is _NOT_FOUND:
+            raise KeyError(key)
+        if root is None:
+            root = _EMPTY
+        elif type(root) is tuple:
+            root = _BitmapNode(1 << (root[0] & _MASK), [root])
+        return self._wrap(root, self._len - 1)
+
+    def update(self, mapping=(), **kwargs):
+        """返回合并了 mapping 和 kwargs 的新版本，参数和 dict.update 一样。"""
+        return self._wrap(*self._bulk_assoc(mapping, kwargs))
+
+    def __repr__(self):
+        return f"PersistentDict({dict(self.items())!r})"
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    d = PersistentDict(name="Alice", age=30, city="New York")
+    d2 = d.set("email", "alice@example.com").set("age", 31)
+    d3 = d2.update({"zip": "10001", "city": "NYC"}).delete("email")
+    print(f"v1: {d}\nv2: {d2}\nv3: {d3}")
+    print(f"v3.get('zip') = {d3.get('zip')}, 'email' in v3: {'email' in d3}, len(v3) = {len(d3)}")
+    print(f"keys: {list(d3.keys())}\nvalues: {list(d3.values())}")
+
+    def per_op(func, ops):
+        start = time.perf_counter()
+        for k in range(ops):
+            func(k)
+        return (time.perf_counter() - start) / ops * 1e6
+
+    print(f"\n{'n':>9} {'操作':<12} {'dict 复制 + 修改 (µs/次)':>26} {'PersistentDict (µs/次)':>24}")
+    for n in (10**3, 10**4, 10**5, 10**6):
+        plain = {f"key{i}": i for i in range(n)}
+        start = time.perf_counter()
+        pd = PersistentDict(plain)
+        build = time.perf_counter() - start
+        dict_ops = max(10, 10**6 // n)
+        pd_ops = 5000
+        changes = {f"key{i}": -i for i in range(0, 10 * 997, 997)}
+
+        def dict_set(k):
+            new = dict(plain)
+            new[f"key{k % n}"] = -1
+            return new
+
+        def dict_delete(k):
+            new = dict(plain)
+            del new[f"key{k % n}"]
+            return new
+
+        def dict_update(k):
+            new = dict(plain)
+            new.update(changes)
+            return new
+
+        cases = [
+            ("set", dict_set, lambda k: pd.set(f"key{k * 7919 % n}", -1)),
+            ("delete", dict_delete, lambda k: pd.delete(f"key{k * 7919 % n}")),
+            ("update(10)", dict_update, lambda k: pd.update(changes)),
+            ("get", lambda k: plain.get(f"key{k % n}"), lambda k: pd.get(f"key{k % n}")),
+        ]
+        for name, dict_func, pd_func in cases:
+            print(f"{n:>9} {name:<12} {per_op(dict_func, dict_ops):>26.2f} {per_op(pd_func, pd_ops):>24.2f}")
+        print(f"{n:>9} {'(一次性构建)':<12} {'':>26} {build * 1e3:>21.1f}ms")
+
+    # 正确性自检：随机操作（包括哈希冲突的键：hash(-1) == hash(-2)）下和 dict 一致，旧版本不受影响
+    rng = random.Random(0)
+    ref, pd = {}, PersistentDict()
+    snapshots = []
+    for step in range(30000):
+        key = rng.choice([rng.randrange(2000), -1, -2, f"s{rng.randrange(50)}"])
+        if rng.random() < 0.3 and key in ref:
+            del ref[key]
+            pd = pd.delete(key)
+        else:
+            ref[key] = step
+            pd = pd.set(key, step)
+        if step % 5000 == 0:
+            snapshots.append((dict(ref), pd))
+    ok = dict(pd.items()) == ref and len(pd) == len(ref)
+    ok = ok and all(dict(snap.items()) == expected for expected, snap in snapshots)
+    print(f"\n30000 次随机 set/delete 后与 dict 一致、历史快照都没变: {ok}")
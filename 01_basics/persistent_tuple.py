@@ -0,0 +1,272 @@
+"""
+持久化向量（Persistent Vector）：能“修改”和“删除”的不可变元组。
+
+tuple_basic.py 里，元组的“增删改”都是重新造一个元组：
+    new = my_tuple + (60,)                          # 增：复制 n 个元素
+    new = my_tuple[:i] + my_tuple[i + 1:]           # 删：两次切片 + 一次拼接，复制约 2n 个元素
+    tmp = list(my_tuple); tmp[1] = 'grape'; new = tuple(tmp)   # 改：复制 2n 个元素
+每次都是 O(n) 的时间和内存。元组只有几个元素时无所谓；但如果是一个几十万项的配置/状态快照，
+每秒要“改”几千次，时间就全花在复制上了。
+
+持久化（persistent）数据结构的思路是“结构共享”：新版本和旧版本共享绝大部分数据，只复制改动的那一小条路径。
+PersistentVector 把元素分成若干个最多 32 个元素的小元组（叶子），叶子再由一棵 B 树组织起来：
+    · 每个内部节点最多 32 个孩子，同时记录“前 k 个孩子一共有多少个元素”（累计大小 sizes），
+      找第 i 个元素时在 sizes 上二分，就知道该往哪个孩子走——这是一棵按大小索引的树（类似 RRB 树）；
+    · 所有叶子深度相同，100 万个元素的树只有 4 层（32^4 ≈ 100 万）；
+    · set / append / insert / delete 只复制从根到目标叶子这一条路径上的节点（每层最多 32 个指针），
+      其他节点原样共享给新版本，所以是 O(log n)，旧版本完全不受影响；
+    · insert 让叶子超过 32 个时一分为二，分裂可能一路向上传到根（树长高一层）；
+      delete 让节点少于 16 个时和相邻的兄弟合并（必要时再平分），保证树始终是平衡的。
+读取（v[i]）也是 O(log n)，遍历是 O(n)，都比元组慢一个常数倍——这是用读的速度换写的速度。
+"""
+from bisect import bisect_right
+from collections.abc import Sequence
+from itertools import accumulate, islice
+
+_MAX = 32  # 每个叶子最多的元素数 / 每个内部节点最多的孩子数
+_MIN = _MAX // 2
+
+
+class _Node:
+    """内部节点：children 是孩子（叶子是元组，否则是 _Node），sizes[k] 是前 k+1 个孩子的元素总数。"""
+
+    __slots__ = ("children", "sizes")
+
+    def __init__(self, children, sizes):
+        self.children = children
+        self.sizes = sizes
+
+
+def _size(node, height):
+    return len(node) if height == 0 else node.sizes[-1]
+
+
+def _width(node, height):
+    return len(node) if height == 0 else len(node.children)
+
+
+def _build(children, height):
+    """用一组高度为 height - 1 的孩子造一个高度为 height 的节点。"""
+    return _Node(children, tuple(accumulate(_size(child, height - 1) for child in children)))
+
+
+def _locate(node, i):
+    """第 i 个元素在第几个孩子里，以及在那个孩子里的下标。i 等于总大小时落在最后一个孩子的末尾（用于 append）。"""
+    sizes = node.sizes
+    j = min(bisect_right(sizes, i), len(sizes) - 1)
+    return j, i - (sizes[j - 1] if j else 0)
+
+
+def _split(items, height):
+    """items 是一串元素（叶子层）或孩子（内部层）；太多时对半分成两个节点。"""
+    if len(items) <= _MAX:
+        parts = (items,)
+    else:
+        mid = len(items) // 2
+        parts = (items[:mid], items[mid:])
+    return parts if height == 0 else tuple(_build(part, height) for part in parts)
+
+
+def _set(node, height, i, value):
+    if height == 0:
+        return node[:i] + (value,) + node[i + 1:]
+    j, sub = _locate(node, i)
+    children = node.children
+    # 大小没变，sizes 直接共享
+    return _Node(children[:j] + (_set(children[j], height - 1, sub, value),) + children[j + 1:], node.sizes)
+
+
+def _insert(node, height, i, value):
+    """返回 1 个或 2 个（分裂时）新节点。"""
+    if height == 0:
+        return _split(node[:i] + (value,) + node[i:], 0)
+    j, sub = _locate(node, i)
+    children = node.children
+    return _split(children[:j] + _insert(children[j], height - 1, sub, value) + children[j + 1:], height)
+
+
+def _merge(left, right, height):
+    """把两个相邻的兄弟合并；合并后太大就平分成两个。"""
+    if height == 0:
+        return _split(left + right, 0)
+    return _split(left.children + right.children, height)
+
+
+def _delete(node, height, i):
+    if height == 0:
+        return node[:i] + node[i + 1:]
+    j, sub = _locate(node, i)
+    child = _delete(node.children[j], height - 1, sub)
+    children = node.children[:j] + (child,) + node.children[j + 1:]
+    if _width(child, height - 1) < _MIN and len(children) > 1:
+        k = j - 1 if j > 0 else j
+        children = children[:k] + _merge(children[k], children[k + 1], height - 1) + children[k + 2:]
+    return _build(children, height)
+
+
+class PersistentVector(Sequence):
+    """不可变序列；set / append / insert / delete 返回新版本，O(log n)，和旧版本共享结构。"""
+
+    __slots__ = ("_root", "_height")
+
+    def __init__(self, iterable=()):
+        # 自底向上批量建树：每 32 个元素一个叶子，每 32 个节点一个父节点，O(n)
+        iterator = iter(iterable)
+        level = []
+        while True:
+            leaf = tuple(islice(iterator, _MAX))
+            if not leaf:
+                break
+            level.append(leaf)
+        height = 0
+        while len(level) > 1:
+            height += 1
+            level = [_build(tuple(level[k:k + _MAX]), height) for k in range(0, len(level), _MAX)]
+        self._root = level[0] if level else ()
+        self._height = height
+
+    @classmethod
+    def _wrap(cls, root, height):
+        vector = cls.__new__(cls)
+        # 根节点只剩一个孩子时，树矮一层
+        while height > 0 and len(root.children) == 1:
+            root = root.children[0]
+            height -= 1
+        vector._root = root
+        vector._height = height
+        return vector
+
+    def __len__(self):
+        return _size(self._root, self._height)
+
+    def _index(self, i, allow_end=False):
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n + allow_end:
+            raise IndexError("PersistentVector index out of range")
+        return i
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return PersistentVector(map(self.__getitem__, range(len(self))[i]))
+        i = self._index(i)
+        node = self._root
+        for _ in range(self._height):
+            j, i = _locate(node, i)
+            node = node.children[j]
+        return node[i]
+
+    def __iter__(self):
+        if self._height == 0:
+            return iter(self._root)
+        return self._leaf_items(self._root, self._height)
+
+    def _leaf_items(self, node, height):
+        if height == 1:
+            for leaf in node.children:
+                yield from leaf
+        else:
+            for child in node.children:
+                yield from self._leaf_items(child, height - 1)
+
+    def set(self, i, value):
+        """返回第 i 个元素改成 value 的新版本。"""
+        i = self._index(i)
+        return self._wrap(_set(self._root, self._height, i, value), self._height)
+
+    def insert(self, i, value):
+        """返回在第 i 个位置插入 value 的新版本（和 list.insert 一样，越界时插到两端）。"""
+        n = len(self)
+        i = max(0, min(i + n if i < 0 else i, n))
+        if self._height == 0 and not self._root:
+            return self._wrap((value,), 0)
+        parts = _insert(self._root, self._height, i, value)
+        if len(parts) == 1:
+            return self._wrap(parts[0], self._height)
+        # 根分裂了，树长高一层
+        return self._wrap(_build(parts, self._height + 1), self._height + 1)
+
+    def append(self, value):
+        return self.insert(len(self), value)
+
+    def delete(self, i):
+        """返回删掉第 i 个元素的新版本。"""
+        i = self._index(i)
+        return self._wrap(_delete(self._root, self._height, i), self._height)
+
+    def __add__(self, other):
+        return PersistentVector([*self, *other])
+
+    def __eq__(self, other):
+        if not isinstance(other, (PersistentVector, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"PersistentVector({list(self)!r})"
+
+
+if __name__ == "__main__":
+    import time
+
+    v = PersistentVector((10, 20, 30, 40, 50))
+    print(f"初始: {v}")
+    print(f"append(60): {v.append(60)}")
+    print(f"delete(2): {v.delete(2)}")
+    print(f"set(1, 'grape'): {v.set(1, 'grape')}")
+    print(f"insert(0, 5): {v.insert(0, 5)}")
+    print(f"旧版本不受影响: {v}")
+
+    def per_op(label, func, ops):
+        start = time.perf_counter()
+        for k in range(ops):
+            func(k)
+        return label, (time.perf_counter() - start) / ops * 1e6
+
+    print(f"\n{'n':>9} {'操作':<8} {'tuple 写法 (µs/次)':>20} {'PersistentVector (µs/次)':>26}")
+    for n in (10**3, 10**4, 10**5, 10**6):
+        t = tuple(range(n))
+        pv = PersistentVector(t)
+        tuple_ops = max(20, 10**6 // n)  # n 越大 tuple 越慢，少跑几次
+        pv_ops = 5000
+
+        def tuple_set(k):
+            tmp = list(t)
+            tmp[k % n] = -1
+            return tuple(tmp)
+
+        cases = [
+            ("set", tuple_set, lambda k: pv.set(k * 7919 % n, -1)),
+            ("append", lambda k: t + (k,), lambda k: pv.append(k)),
+            ("delete", lambda k: t[:k % n] + t[k % n + 1:], lambda k: pv.delete(k * 7919 % n)),
+            ("insert", lambda k: t[:n // 2] + (k,) + t[n // 2:], lambda k: pv.insert(n // 2, k)),
+            ("get", lambda k: t[k * 7919 % n], lambda k: pv[k * 7919 % n]),
+        ]
+        for name, tuple_func, pv_func in cases:
+            _, tuple_us = per_op(name, tuple_func, tuple_ops)
+            _, pv_us = per_op(name, pv_func, pv_ops)
+            print(f"{n:>9} {name:<8} {tuple_us:>20.2f} {pv_us:>26.2f}")
+
+    # 正确性自检：随机操作序列下和 list 的结果一致
+    import random
+    rng = random.Random(0)
+    ref, pv = [], PersistentVector()
+    for _ in range(20000):
+        op = rng.random()
+        if op < 0.4 or not ref:
+            i = rng.randint(0, len(ref))
+            ref.insert(i, op)
+            pv = pv.insert(i, op)
+        elif op < 0.7:
+            i = rng.randrange(len(ref))
+            del ref[i]
+            pv = pv.delete(i)
+        else:
+            i = rng.randrange(len(ref))
+            ref[i] = op
+            pv = pv.set(i, op)
+    print(f"\n20000 次随机 insert/delete/set 后与 list 一致: {list(pv) == ref} (长度 {len(pv)}, 树高 {pv._height})")
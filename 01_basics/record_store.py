@@ -0,0 +1,371 @@
+"""
+记录仓库 RecordStore：把“每条记录一个字典”换成“每个字段一列”。
+
+dict_basic.py 用一个字典表示一个人：{"name": "Alice", "age": 30, "city": "New York"}。
+几百万条这样的记录放在一个列表里，每条都要付出：
+    · 一个 dict 对象本身（3 个键也要 180 多字节，还没算里面的值）；
+    · 每个值一个独立的 Python 对象：从文件 / 数据库里读出来的 "New York"，每条记录都是一个新的字符串对象；
+    · 扫描时要在内存里东跳西跳：dict -> 值对象 -> 下一个 dict……CPU 缓存基本用不上。
+
+RecordStore 的做法（行存变列存，struct-of-arrays）：
+    · 字段是固定的（schema），在创建时声明：{"name": str, "age": "H", "city": str}；
+    · 数值字段：一列就是一个 array.array，"H" 每个值 2 字节、"q"（int 的默认）8 字节、"d"（float）8 字节，
+      数据紧挨着存，没有对象头；
+    · 字符串字段：每个不同的字符串只存一份（用 sys.intern 驻留），列里只存它的编号（array('I')，每个 4 字节）。
+      city 这种只有几十种取值的字段，10^6 条记录就只有几十个字符串对象；
+      按字符串过滤（where(city="NYC")）时比较的也是整数编号，而不是逐个比较字符串；
+    · store[i] 返回一个很轻的行代理 Row（__slots__，只记着仓库和行号），
+      和字典一样支持 row["age"]、row.get("email")、"age" in row、keys() / values() / items()，
+      row["age"] = 31 直接改回列里；
+    · 整列批量操作：column("age") 拿到整列的快照，update({"age": [...]}) 整列替换（或只替换 rows 指定的那些行）。
+代价：
+    · 字段固定：不能像 dict_basic.py 那样随手给某一条记录加个 "email"；
+    · 数值范围受类型限制（"H" 只能存 0~65535，超出会 OverflowError）；
+    · 构建时要逐个驻留、编号字符串，比直接建 dict 慢；
+    · 通过 Row 一个个字段地读，比直接读 dict 慢得多（每个字段都是一次 Python 函数调用）——要快就整列地读。
+"""
+import sys
+from array import array
+from collections.abc import Mapping
+from itertools import repeat
+
+# schema 里可以直接写 Python 类型，也可以写 array 的类型码（"b"、"H"、"i"、"f"……）来用更窄的类型
+_TYPECODES = {int: "q", float: "d"}
+_DEFAULTS = {str: ""}
+
+
+class Row(Mapping):
+    """一条记录的只读视图 + 按字段赋值；不复制任何数据。"""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, field):
+        store = self._store
+        value = store._columns[field][self._index]
+        strings = store._strings.get(field)
+        return value if strings is None else strings[value]
+
+    def __setitem__(self, field, value):
+        self._store._set(self._index, field, value)
+
+    def __contains__(self, field):
+        return field in self._store._columns
+
+    def __iter__(self):
+        return iter(self._store._columns)
+
+    def __len__(self):
+        return len(self._store._columns)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Row({self._index}, {self.to_dict()!r})"
+
+
+class RecordStore:
+    """固定字段、按列存储的记录集合。"""
+
+    def __init__(self, schema, records=()):
+        self.schema = dict(schema)
+        self._columns = {}  # 字段 -> array；字符串字段存的是编号
+        self._strings = {}  # 字符串字段 -> 编号对应的字符串列表
+        self._codes = {}  # 字符串字段 -> {字符串: 编号}
+        for field, kind in self.schema.items():
+            if kind is str:
+                self._columns[field] = array("I")
+                self._strings[field] = []
+                self._codes[field] = {}
+            else:
+                self._columns[field] = array(_TYPECODES.get(kind, kind))
+        self._len = 0
+        self.extend(records)
+
+    # --- 字符串编号 ---
+    def _encode(self, field, value):
+        codes = self._codes[field]
+        code = codes.get(value)
+        if code is None:
+            if not isinstance(value, str):
+                raise TypeError(f"字段 {field!r} 需要 str，得到 {type(value).__name__}")
+            code = codes[value] = len(codes)
+            self._strings[field].append(sys.intern(value))
+        return code
+
+    def _encode_many(self, field, values):
+        """批量编号：先把没见过的字符串登记进字符串表，再一次性（在 C 里）查出所有编号。"""
+        codes = self._codes[field]
+        strings = self._strings[field]
+        for value in dict.fromkeys(values):
+            if value in codes:
+                continue
+            if not isinstance(value, str):
+                raise TypeError(f"字段 {field!r} 需要 str，得到 {type(value).__name__}")
+            codes[value] = len(strings)
+            strings.append(sys.intern(value))
+        return map(codes.__getitem__, values)
+
+    def _string_marks(self):
+        return {field: len(strings) for field, strings in self._strings.items()}
+
+    def _rollback_strings(self, marks):
+        """写入失败时撤掉这次新登记的字符串：字符串表回到 marks 记下的长度，不会因为失败的写入越变越大。"""
+        for field, mark in marks.items():
+            strings = self._strings[field]
+            codes = self._codes[field]
+            for value in strings[mark:]:
+                del codes[value]
+            del strings[mark:]
+
+    # --- 增 ---
+    def _encode_columns(self, records):
+        """
+        把一批记录按列转成 array。所有列都转换成功之后才会写进仓库，中途出错不会留下长短不一的列，
+        已经登记的新字符串也会撤回。
+        """
+        unknown = set().union(*records) - self._columns.keys()
+        if unknown:
+            raise KeyError(f"schema 里没有这些字段: {sorted(unknown)}")
+        new = {}
+        marks = self._string_marks()
+        try:
+            for field, column in self._columns.items():
+                default = _DEFAULTS.get(self.schema[field], 0)
+                values = [record.get(field, default) for record in records]
+                new[field] = array(column.typecode,
+                                   self._encode_many(field, values) if field in self._codes else values)
+        except BaseException:
+            self._rollback_strings(marks)
+            raise
+        return new
+
+    def append(self, record=None, **fields):
+        """追加一条记录（字典或关键字参数），返回它的行号。缺的字段用 0 / "" 补上。"""
+        if record is not None:
+            fields = {**record, **fields}
+        self.extend((fields,))
+        return self._len - 1
+
+    def extend(self, records):
+        """批量追加：按列收集好之后每列一次性 extend。"""
+        records = list(records)
+        if not records:
+            return
+        for field, values in self._encode_columns(records).items():
+            self._columns[field].extend(values)
+        self._len += len(records)
+
+    # --- 删 ---
+    def __delitem__(self, index):
+        """删除一行：每一列都要挪动后面的元素，O(n)。字符串表不回收。"""
+        index = self._normalize(index)
+        for column in self._columns.values():
+            del column[index]
+        self._len -= 1
+
+    def pop(self, index=-1):
+        record = self[index].to_dict()
+        del self[index]
+        return record
+
+    def clear(self):
+        self.__init__(self.schema)
+
+    # --- 改 ---
+    def _set(self, index, field, value):
+        column = self._columns[field]
+        column[index] = self._encode(field, value) if field in self._codes else value
+
+    def update(self, columns, rows=None):
+        """
+        整列批量更新：columns 是 {字段: 新值序列}。
+        rows 为 None 时替换整列（新值个数必须等于记录数）；否则只改 rows 里这些行号，新值和行号一一对应。
+        行号、值的个数和类型全部检查通过之后才开始写，出错时仓库保持原样（包括字符串表）。
+        """
+        for field in columns:
+            if field not in self._columns:
+                raise KeyError(f"schema 里没有字段 {field!r}")
+        if rows is not None:
+            # 先把所有行号检查一遍（越界直接 IndexError），一个值都还没写
+            rows = [self._normalize(i) for i in rows]
+        expected = self._len if rows is None else len(rows)
+        new = {}
+        marks = self._string_marks()
+        try:
+            for field, values in columns.items():
+                values = list(values)
+                if field in self._codes:
+                    values = self._encode_many(field, values)
+                new[field] = array(self._columns[field].typecode, values)
+                if len(new[field]) != expected:
+                    raise ValueError(f"字段 {field!r} 需要 {expected} 个值，得到 {len(new[field])} 个")
+        except BaseException:
+            self._rollback_strings(marks)
+            raise
+        for field, values in new.items():
+            if rows is None:
+                self._columns[field] = values
+            else:
+                column = self._columns[field]
+                for i, value in zip(rows, values):
+                    column[i] = value
+
+    # --- 查 ---
+    def _normalize(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("RecordStore index out of range")
+        return index
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        return Row(self, self._normalize(index))
+
+    def __iter__(self):
+        return map(Row, repeat(self), range(self._len))
+
+    def column(self, field):
+        """
+        整列的值（快照）：数值字段是一个新的 array（整块内存复制，很快），字符串字段是解码后的列表。
+        不直接返回列本身的 memoryview：调用方拿着它时，列上的 append / del 会抛 BufferError。
+        """
+        column = self._columns[field]
+        strings = self._strings.get(field)
+        if strings is None:
+            return array(column.typecode, column)
+        return list(map(strings.__getitem__, column))
+
+    def where(self, **conditions):
+        """按字段等值过滤，返回满足所有条件的行号列表，例如 where(city="NYC")。"""
+        rows = None
+        for field, value in conditions.items():
+            column = self._columns[field]
+            if field in self._codes:
+                value = self._codes[field].get(value)
+                if value is None:
+                    return []
+            if rows is None:
+                rows = [i for i, v in enumerate(column) if v == value]
+            else:
+                rows = [i for i in rows if column[i] == value]
+        return list(range(self._len)) if rows is None else rows
+
+    def nbytes(self):
+        """各列 array 的大小，加上字符串表（字符串对象本身 + 编号字典）。"""
+        total = sum(column.itemsize * len(column) for column in self._columns.values())
+        for field, strings in self._strings.items():
+            total += sys.getsizeof(strings) + sum(map(sys.getsizeof, strings))
+            total += sys.getsizeof(self._codes[field])
+        return total
+
+    def __repr__(self):
+        return f"RecordStore({len(self)} 条记录, 字段 {list(self.schema)})"
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    import tracemalloc
+
+    people = RecordStore({"name": str, "age": "H", "city": str})
+    alice = people[people.append(name="Alice", age=30, city="New York")]
+    print(f"初始记录: {alice.to_dict()}")
+    alice["age"] = 31
+    print(f"修改 'age': {alice['age']}, 'email' 在记录里: {'email' in alice}, get('email', 'N/A') = {alice.get('email', 'N/A')}")
+    people.extend([{"name": "Bob", "age": 25, "city": "NYC"}, {"name": "Carol", "age": 41, "city": "NYC"}])
+    people.update({"city": ["NYC"]}, rows=[0])
+    print(f"keys = {list(alice.keys())}, items = {list(alice.items())}")
+    print(f"住在 NYC 的行号: {people.where(city='NYC')}, 每个人的年龄: {list(people.column('age'))}")
+    try:
+        people.append(name="Dave", email="dave@example.com")
+    except KeyError as e:
+        print(f"添加 schema 以外的字段时出错: {e}")
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10**6
+    rng = random.Random(0)
+    cities = ["New York", "NYC", "London", "Paris", "Tokyo", "Berlin", "Beijing", "Shanghai"]
+    # 模拟从 CSV 读进来的数据：每一行 split 出来的字符串都是新对象
+    lines = [f"user{i},{rng.randrange(18, 90)},{rng.choice(cities)}" for i in range(n)]
+
+    def load_dicts():
+        rows = []
+        for line in lines:
+            name, age, city = line.split(",")
+            rows.append({"name": name, "age": int(age), "city": city})
+        return rows
+
+    def load_store():
+        store = RecordStore({"name": str, "age": "H", "city": str})
+        batch = []
+        for line in lines:
+            name, age, city = line.split(",")
+            batch.append({"name": name, "age": int(age), "city": city})
+            if len(batch) == 10_000:
+                store.extend(batch)
+                batch.clear()
+        store.extend(batch)
+        return store
+
+    def measure(load):
+        start = time.perf_counter()
+        data = load()
+        elapsed = time.perf_counter() - start
+        del data
+        tracemalloc.start()
+        data = load()
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return data, elapsed, current
+
+    dicts, t_dicts, m_dicts = measure(load_dicts)
+    store, t_store, m_store = measure(load_store)
+    print(f"\n--- n = {n} ---")
+    print(f"{'':<14} {'构建':>8} {'内存':>10} {'每条记录':>10}")
+    print(f"{'list of dict':<14} {t_dicts:>7.2f}s {m_dicts / 2**20:>8.1f}MB {m_dicts / n:>8.1f} 字节")
+    print(f"{'RecordStore':<14} {t_store:>7.2f}s {m_store / 2**20:>8.1f}MB {m_store / n:>8.1f} 字节")
+
+    def timeit(func, repeat=3):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    def dicts_avg_age():
+        ages = [r["age"] for r in dicts if r["city"] == "NYC"]
+        return sum(ages) / len(ages)
+
+    def store_avg_age():
+        ages = store.column("age")
+        rows = store.where(city="NYC")
+        return sum(ages[i] for i in rows) / len(rows)
+
+    def dicts_birthday():
+        for r in dicts:
+            r["age"] += 1
+
+    def store_birthday():
+        store.update({"age": [a + 1 for a in store.column("age")]})
+
+    cases = [
+        ("NYC 的平均年龄", dicts_avg_age, store_avg_age),
+        ("age > 60 的人数", lambda: sum(1 for r in dicts if r["age"] > 60),
+         lambda: sum(1 for a in store.column("age") if a > 60)),
+        ("逐行读 age（Row）", lambda: sum(r["age"] for r in dicts), lambda: sum(r["age"] for r in store)),
+        ("所有人 age + 1", dicts_birthday, store_birthday),
+    ]
+    print(f"\n{'扫描':<18} {'list of dict':>14} {'RecordStore':>12}  结果一致")
+    for name, on_dicts, on_store in cases:
+        t_a, r_a = timeit(on_dicts)
+        t_b, r_b = timeit(on_store)
+        print(f"{name:<18} {t_a * 1e3:>12.1f}ms {t_b * 1e3:>10.1f}ms  {r_a == r_b}")
+    print(f"最后一条记录: {store[-1].to_dict() == dicts[-1]}")
@@ -0,0 +1,374 @@
+"""
+有序列表 SortedList：一直保持有序，插入和删除都是 O(log n)（摊还）。
+
+list_basic.py 里的 my_list.insert(1, 15) 和 my_list.remove(15) 都要把后面的元素整体挪一位（memmove），O(n)。
+维护一个有序的时间戳列表时，常见写法是 bisect.insort(timestamps, t)：二分查找是 O(log n)，
+但真正插入时还是 list.insert，10^7 个元素时每次要挪几十 MB 的指针。
+
+SortedList 的做法（和第三方库 sortedcontainers 同一个思路）：
+    · 数据不放在一个大列表里，而是切成很多个有序的小列表（每个约 _LOAD 个元素），按顺序排好：_lists；
+      _maxes[i] 是第 i 个小列表的最大值。
+    · 插入 / 删除 / 查找某个值：先在 _maxes 上二分，找到它该在哪个小列表，再在这个小列表里二分。
+      真正挪动的只是一个小列表里的几百个指针，和总长度无关；
+    · 小列表长到 2 * _LOAD 时一分为二，删到少于 _LOAD / 2 时和邻居合并，保证每个小列表的大小都在一个范围内；
+    · “第 k 个元素是谁”（下标访问 sl[k]）和“这个值排第几”（bisect / index）需要知道前面所有小列表一共有多少个元素。
+      逐个加是 O(n / _LOAD)，这里用一棵树状数组（Fenwick Tree）维护小列表长度的前缀和：
+      更新一个小列表的长度、求前缀和、按前缀和反查第几个小列表，都是 O(log(小列表个数))。
+      小列表分裂、合并时树状数组整个作废，下次用到时再 O(小列表个数) 重建。
+
+和 list_basic.py 一样的增删改查：
+    增：add(x)、update(iterable)。append / insert / extend 会破坏顺序，按设计不支持，直接抛 TypeError；
+    删：remove(x)、discard(x)、pop(i)、del sl[i]、del sl[i:j]、clear()；
+    改：sl[i] = x 同样会破坏顺序，不支持（TypeError）——先 remove 再 add；
+    查：sl[i]、sl[i:j]、len、in、index(x)、count(x)，以及
+        bisect_left / bisect_right（x 应该插在第几个位置）、irange(最小值, 最大值)（按值取一段范围）。
+"""
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+
+_LOAD = 1000
+
+
+class SortedList:
+    """始终有序的列表。"""
+
+    __slots__ = ("_lists", "_maxes", "_tree", "_len")
+
+    def __init__(self, iterable=()):
+        self._lists = []
+        self._maxes = []
+        self._tree = None  # 树状数组，None 表示需要重建
+        self._len = 0
+        self.update(iterable)
+
+    # --- 树状数组：小列表长度的前缀和 ---
+    def _build_tree(self):
+        tree = [0]
+        tree.extend(map(len, self._lists))
+        size = len(tree) - 1
+        for i in range(1, size + 1):
+            j = i + (i & -i)
+            if j <= size:
+                tree[j] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _tree_add(self, pos, delta):
+        tree = self._tree
+        if tree is None:
+            return
+        i = pos + 1
+        size = len(tree) - 1
+        while i <= size:
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, pos):
+        """前 pos 个小列表一共有多少个元素。"""
+        tree = self._tree or self._build_tree()
+        total = 0
+        while pos > 0:
+            total += tree[pos]
+            pos -= pos & -pos
+        return total
+
+    def _locate(self, index):
+        """第 index 个元素（0 开始）在第几个小列表的第几个位置。"""
+        tree = self._tree or self._build_tree()
+        size = len(tree) - 1
+        pos = 0
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt <= size and tree[nxt] <= index:
+                index -= tree[nxt]
+                pos = nxt
+            step >>= 1
+        return pos, index
+
+    def _normalize(self, index):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("SortedList index out of range")
+        return index
+
+    # --- 增 ---
+    def add(self, value):
+        lists, maxes = self._lists, self._maxes
+        if not maxes:
+            lists.append([value])
+            maxes.append(value)
+            self._tree = None
+            self._len = 1
+            return
+        pos = bisect_right(maxes, value)
+        if pos == len(maxes):
+            pos -= 1
+            lists[pos].append(value)
+            maxes[pos] = value
+        else:
+            insort(lists[pos], value)
+        self._len += 1
+        self._tree_add(pos, 1)
+        if len(lists[pos]) > 2 * _LOAD:
+            self._split(pos)
+
+    def _split(self, pos):
+        chunk = self._lists[pos]
+        half = chunk[_LOAD:]
+        del chunk[_LOAD:]
+        self._maxes[pos] = chunk[-1]
+        self._lists.insert(pos + 1, half)
+        self._maxes.insert(pos + 1, half[-1])
+        self._tree = None
+
+    def update(self, iterable):
+        """批量添加。数据量大时直接整体排序再切块，比逐个 add 快得多。"""
+        values = list(iterable)
+        if not values:
+            return
+        if len(values) * 4 >= self._len:
+            values = sorted(chain(self, values)) if self._len else sorted(values)
+            self._lists = [values[i:i + _LOAD] for i in range(0, len(values), _LOAD)]
+            self._maxes = [chunk[-1] for chunk in self._lists]
+            self._len = len(values)
+            self._tree = None
+        else:
+            for value in values:
+                self.add(value)
+
+    def append(self, value):
+        raise TypeError("SortedList 会自动排序，请用 add()")
+
+    def insert(self, index, value):
+        raise TypeError("SortedList 会自动排序，请用 add()")
+
+    def extend(self, iterable):
+        raise TypeError("SortedList 会自动排序，请用 update()")
+
+    def __setitem__(self, index, value):
+        raise TypeError("直接改某个位置的值会破坏顺序，请先 remove() 再 add()")
+
+    # --- 删 ---
+    def _delete(self, pos, idx):
+        lists, maxes = self._lists, self._maxes
+        chunk = lists[pos]
+        del chunk[idx]
+        self._len -= 1
+        self._tree_add(pos, -1)
+        if not chunk:
+            del lists[pos]
+            del maxes[pos]
+            self._tree = None
+        elif len(chunk) < _LOAD // 2 and len(lists) > 1:
+            # 太小了：和邻居合并（合并后太大再分开），避免出现一堆几乎空的小列表
+            left = pos - 1 if pos > 0 else pos
+            lists[left].extend(lists[left + 1])
+            maxes[left] = lists[left][-1]
+            del lists[left + 1]
+            del maxes[left + 1]
+            self._tree = None
+            if len(lists[left]) > 2 * _LOAD:
+                self._split(left)
+        else:
+            maxes[pos] = chunk[-1]
+
+    def discard(self, value):
+        """删除一个等于 value 的元素；不存在时什么也不做。"""
+        maxes = self._maxes
+        pos = bisect_left(maxes, value)
+        if pos == len(maxes):
+            return False
+        chunk = self._lists[pos]
+        idx = bisect_left(chunk, value)
+        if chunk[idx] != value:
+            return False
+        self._delete(pos, idx)
+        return True
+
+    def remove(self, value):
+        """删除一个等于 value 的元素；不存在时抛 ValueError（和 list.remove 一样）。"""
+        if not self.discard(value):
+            raise ValueError(f"{value!r} not in SortedList")
+
+    def pop(self, index=-1):
+        if not self._len:
+            raise IndexError("pop from empty SortedList")
+        index = self._normalize(index)
+        if index == self._len - 1:
+            pos, idx = len(self._lists) - 1, len(self._lists[-1]) - 1
+        else:
+            pos, idx = self._locate(index)
+        value = self._lists[pos][idx]
+        self._delete(pos, idx)
+        return value
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            doomed = range(self._len)[index]
+            if len(doomed) > self._len // 8:
+                # 删得多：剩下的重新切块
+                doomed = set(doomed)
+                remaining = [v for i, v in enumerate(self) if i not in doomed]
+                self.clear()
+                self.update(remaining)
+            else:
+                # 从后往前删，前面的下标不受影响
+                for i in sorted(doomed, reverse=True):
+                    self._delete(*self._locate(i))
+            return
+        self._delete(*self._locate(self._normalize(index)))
+
+    def clear(self):
+        self._lists = []
+        self._maxes = []
+        self._tree = None
+        self._len = 0
+
+    # --- 查 ---
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return chain.from_iterable(self._lists)
+
+    def __reversed__(self):
+        return chain.from_iterable(map(reversed, reversed(self._lists)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step == 1:
+                if start >= stop:
+                    return []
+                # 只碰落在 [start, stop) 里的那几个小列表
+                lists = self._lists
+                pos, idx = self._locate(start)
+                end_pos, end_idx = self._locate(stop - 1)
+                if pos == end_pos:
+                    return lists[pos][idx:end_idx + 1]
+                result = lists[pos][idx:]
+                for i in range(pos + 1, end_pos):
+                    result.extend(lists[i])
+                result.extend(lists[end_pos][:end_idx + 1])
+                return result
+            return [self[i] for i in range(start, stop, step)]
+        index = self._normalize(index)
+        if index == 0:
+            return self._lists[0][0]
+        if index == self._len - 1:
+            return self._lists[-1][-1]
+        pos, idx = self._locate(index)
+        return self._lists[pos][idx]
+
+    def __contains__(self, value):
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return False
+        chunk = self._lists[pos]
+        return chunk[bisect_left(chunk, value)] == value
+
+    def bisect_left(self, value):
+        """value 插进来时应该放在第几个位置（相等的元素放在它后面）。"""
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._prefix(pos) + bisect_left(self._lists[pos], value)
+
+    def bisect_right(self, value):
+        pos = bisect_right(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._prefix(pos) + bisect_right(self._lists[pos], value)
+
+    def index(self, value, start=0, stop=None):
+        """在 [start, stop) 里第一个等于 value 的位置（和 list.index 一样，下标可以是负数）。"""
+        start, stop, _ = slice(start, stop).indices(self._len)
+        i = max(self.bisect_left(value), start)
+        if i < stop and self[i] == value:
+            return i
+        raise ValueError(f"{value!r} is not in SortedList")
+
+    def count(self, value):
+        return self.bisect_right(value) - self.bisect_left(value)
+
+    def irange(self, minimum=None, maximum=None, inclusive=(True, True)):
+        """按值取范围：minimum <= x <= maximum 的所有元素（从小到大）。None 表示这一端不设限。"""
+        if minimum is None:
+            start = 0
+        else:
+            start = self.bisect_left(minimum) if inclusive[0] else self.bisect_right(minimum)
+        if maximum is None:
+            stop = self._len
+        else:
+            stop = self.bisect_right(maximum) if inclusive[1] else self.bisect_left(maximum)
+        return self[start:stop]
+
+    def __eq__(self, other):
+        if isinstance(other, (SortedList, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"SortedList({list(self)!r})"
+
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+
+    sl = SortedList([50, 10, 40, 20, 30])
+    sl.add(15)
+    print(f"add(15): {sl}")
+    sl.remove(15)
+    print(f"remove(15): {sl}, pop(): {sl.pop()}, pop(0): {sl.pop(0)} -> {sl}")
+    sl.update([35, 45, 25])
+    print(f"update([35, 45, 25]): {sl}")
+    print(f"第 2 小的元素 sl[2] = {sl[2]}, sl[1:3] = {sl[1:3]}, 25 <= x < 40 的元素: {sl.irange(25, 40, (True, False))}")
+    print(f"index(35) = {sl.index(35)}, count(35) = {sl.count(35)}, bisect_left(33) = {sl.bisect_left(33)}")
+    try:
+        sl.insert(0, 5)
+    except TypeError as e:
+        print(f"insert 不支持: {e}")
+
+    def per_op(func, ops):
+        start = time.perf_counter()
+        for k in range(ops):
+            func(k)
+        return (time.perf_counter() - start) / ops * 1e6
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10**4, 10**5, 10**6, 10**7]
+    print(f"\n{'n':>9} {'操作':<16} {'list + bisect (µs/次)':>22} {'SortedList (µs/次)':>20}")
+    for n in sizes:
+        rng = random.Random(n)
+        data = sorted(rng.random() for _ in range(n))
+        plain = list(data)
+        start = time.perf_counter()
+        sl = SortedList(data)
+        build = time.perf_counter() - start
+        ops = 2000
+        new_values = [rng.random() for _ in range(ops)]
+        ranks = [rng.randrange(n // 2) for _ in range(ops)]
+
+        def list_remove(k):
+            i = bisect_left(plain, new_values[k])
+            del plain[i]
+
+        def list_range(k):
+            lo = new_values[k]
+            return plain[bisect_left(plain, lo):bisect_right(plain, lo + 100 / n)]
+
+        cases = [
+            ("add", lambda k: insort(plain, new_values[k]), lambda k: sl.add(new_values[k])),
+            ("remove", list_remove, lambda k: sl.remove(new_values[k])),
+            ("sl[k]（第 k 小）", lambda k: plain[ranks[k]], lambda k: sl[ranks[k]]),
+            ("bisect_left", lambda k: bisect_left(plain, new_values[k]), lambda k: sl.bisect_left(new_values[k])),
+            ("范围查询(~100个)", list_range, lambda k: sl.irange(new_values[k], new_values[k] + 100 / n)),
+            ("x in", lambda k: plain[bisect_left(plain, new_values[k]) % n] == new_values[k],
+             lambda k: new_values[k] in sl),
+        ]
+        for name, list_func, sl_func in cases:
+            print(f"{n:>9} {name:<16} {per_op(list_func, ops):>22.2f} {per_op(sl_func, ops):>20.2f}")
+        print(f"{n:>9} {'(构建)':<16} {'':>22} {build * 1e3:>18.1f}ms  结果一致: {sl == plain}")
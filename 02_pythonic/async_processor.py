@@ -0,0 +1,161 @@
+"""
+safe_processor 的 asyncio 版本：comprehensions.py 异常推演里的 call_api(x) 场景。
+
+网络请求的耗时几乎全在“等”：等连接、等服务器、等数据回来。串行的 safe_processor 每次只发一个请求，
+CPU 大部分时间都在空转。asyncio 的做法是同时发出很多请求，谁先回来先处理谁。
+
+但“同时发出”不能是“全部发出”，否则 1 亿条数据就是 1 亿个 Task，又回到了 OOM 的老路。所以：
+    · Semaphore(concurrency) 限制同时进行中的请求数，保护下游服务；
+    · 已经创建但还没被消费的 Task 最多 concurrency * 2 个，输入流按需读取，内存恒定；
+    · 每次调用用 asyncio.wait_for 加超时，失败后按指数退避（backoff * 2^attempt）重试，退避期间不占用信号量；
+    · 重试用完仍失败，和 safe_processor 一样：交给 sink，计入 metrics，跳过，继续处理后面的数据；
+    · ordered=True 按输入顺序吐出结果，ordered=False 谁先完成先吐谁（慢请求不会堵住后面的）。
+
+直接运行本文件，会在本机起一个带随机延迟、会偶尔超时/报错的假服务器，对比串行和并发的耗时。
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+
+from comprehensions import PipelineMetrics
+
+logger = logging.getLogger(__name__)
+
+_EXHAUSTED = object()
+
+
+async def _call_with_retry(call, item, semaphore, timeout, retries, backoff):
+    """调用 call(item)，超时或出错时重试；返回 (是否成功, 结果或最后一次的异常, 总耗时纳秒)。"""
+    started = time.perf_counter_ns()
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                result = await asyncio.wait_for(call(item), timeout)
+            return True, result, time.perf_counter_ns() - started
+        except Exception as e:
+            error = e
+            if attempt < retries:
+                await asyncio.sleep(backoff * 2 ** attempt)
+    return False, error, time.perf_counter_ns() - started
+
+
+async def async_safe_processor(data_stream, call, concurrency=10, timeout=1.0, retries=2, backoff=0.1,
+                               ordered=False, sink=None, metrics=None):
+    """
+    异步生成器：对 data_stream 中的每个元素 await call(item)，跳过最终失败的元素。
+    data_stream 是普通的可迭代对象；sink / metrics 的用法和 safe_processor 一样。
+    """
+    if metrics is None:
+        metrics = PipelineMetrics(track_latency=False)
+    semaphore = asyncio.Semaphore(concurrency)
+    max_pending = concurrency * 2
+    items = iter(data_stream)
+    # 有序模式用队列（先进先出）；无序模式用集合，配合 asyncio.wait 取最先完成的
+    pending = deque() if ordered else set()
+    add_pending = pending.append if ordered else pending.add
+
+    def submit_next():
+        item = next(items, _EXHAUSTED)
+        if item is _EXHAUSTED:
+            return False
+        task = asyncio.ensure_future(_call_with_retry(call, item, semaphore, timeout, retries, backoff))
+        task.item = item  # 失败时要把原始数据交给 sink
+        add_pending(task)
+        return True
+
+    metrics.start()
+    try:
+        while len(pending) < max_pending and submit_next():
+            pass
+
+        while pending:
+            if ordered:
+                head = pending.popleft()
+                await asyncio.wait([head])
+                done = [head]
+            else:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                pending.difference_update(done)
+
+            for task in done:
+                submit_next()
+                ok, value, elapsed_ns = task.result()
+                if metrics.track_latency:
+                    metrics.latency.record(elapsed_ns)
+                if ok:
+                    metrics.success += 1
+                    yield value
+                else:
+                    metrics.failed += 1
+                    if sink is None:
+                        logger.debug("[Log] Skipping error: %r", value)
+                    else:
+                        sink(task.item, value)
+    finally:
+        # 消费者提前退出时，取消还在路上的请求
+        for task in pending:
+            task.cancel()
+        logger.info("--- 处理总结: %s ---", metrics.summary())
+
+
+# --- 本地假服务器：注入延迟、超时和错误 ---
+async def start_fake_server(latency=(0.01, 0.05), timeout_rate=0.05, error_rate=0.05):
+    """
+    起一个本机 TCP 服务：收到一行数字 x，等待随机延迟后返回 x * 2。
+    timeout_rate 的请求永远不回复（触发客户端超时），error_rate 的请求返回 ERR。
+    返回 (server, port)。
+    """
+    async def handle(reader, writer):
+        try:
+            x = int(await reader.readline())
+            roll = random.random()
+            if roll < timeout_rate:
+                # 模拟服务器卡死：一直不回复，直到客户端超时后断开连接
+                await reader.read()
+                return
+            await asyncio.sleep(random.uniform(*latency))
+            writer.write(b"ERR\n" if roll > 1 - error_rate else f"{x * 2}\n".encode())
+            await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def make_call_api(port):
+    """返回一个 call_api(x) 协程函数：连接假服务器，发送 x，读取结果。"""
+    async def call_api(x):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            writer.write(f"{x}\n".encode())
+            await writer.drain()
+            reply = (await reader.readline()).strip()
+            if reply == b"ERR":
+                raise ValueError(f"Server error: {x}")
+            return int(reply)
+        finally:
+            writer.close()
+    return call_api
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    server, port = await start_fake_server()
+    call_api = make_call_api(port)
+    data = range(200)
+
+    async with server:
+        for concurrency in (1, 50):
+            metrics = PipelineMetrics()
+            start = time.perf_counter()
+            results = [r async for r in async_safe_processor(data, call_api, concurrency=concurrency, timeout=0.2,
+                                                              retries=2, backoff=0.05, ordered=True, metrics=metrics)]
+            print(f"并发 {concurrency:>2}: 耗时 {time.perf_counter() - start:.2f}s, 有效结果 {len(results)}, "
+                  f"按输入顺序: {results == sorted(results)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,224 @@
+"""
+基准测试套件：把 comprehensions.py / iterators_code_01.py 里零散的 time.time() 对比收拢到一个地方。
+
+为什么不能再用“start = time.time(); ...; end - start”？
+    1. 只跑一次：第一次运行要预热（内存分配器、CPU 缓存、频率爬升），单次数字噪声很大。
+    2. time.time() 是墙上时钟，可能被 NTP 校时拨动，精度也不够；测耗时应该用单调、高精度的 perf_counter_ns()。
+    3. 结果只打印在屏幕上，换个 Python 版本就没法对比。
+
+这个模块的做法：
+    · 用 @register 把用例登记到注册表，用例函数只接收一个参数 n（数据量）。
+    · 每个用例先跑 warmup 次热身（不计时），再跑 repeat 次计时，报告中位数（median）和 p95。
+    · 计时跑完后再单独跑一次带 tracemalloc 的，得到 Python 层面的峰值内存（tracemalloc 本身很慢，所以不和计时混在一起）。
+    · 进程峰值 RSS 取自 resource.getrusage，是整个进程的历史最高值，只能作为参考。
+    · --output 把结果连同解释器版本写成 JSON；--compare 读入旧的 JSON，逐个用例打印新旧中位数的比值。
+
+用法：
+    python benchmark.py --size 1000000 --repeat 5 --output py311.json
+    python3.13 benchmark.py --size 1000000 --repeat 5 --compare py311.json
+"""
+import argparse
+import gc
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+from comprehension_backends import BACKENDS, plus_one, run_pipeline
+from comprehensions import test_for_loop, test_comprehension, test_generator
+from iterators_code_01 import CompactEagerList, EagerList, LazyIterator
+
+try:
+    import resource  # 只有类 Unix 系统有
+except ImportError:
+    resource = None
+
+_REGISTRY = {}
+
+
+def register(name=None):
+    """装饰器：把 func(n) 登记为一个基准用例，默认用函数名当用例名。"""
+    def decorator(func):
+        _REGISTRY[name or func.__name__] = func
+        return func
+    return decorator
+
+
+def registered_cases():
+    return list(_REGISTRY)
+
+
+def _percentile(sorted_values, p):
+    """最近秩法（nearest-rank）求百分位，sorted_values 必须已排序。"""
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位是 KB，macOS 上是字节
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(name, n, warmup=1, repeat=5, trace_memory=True):
+    """运行一个用例，返回一个可以直接写进 JSON 的字典。"""
+    func = _REGISTRY[name]
+    for _ in range(warmup):
+        func(n)
+
+    timings = []
+    for _ in range(repeat):
+        # 计时期间关掉 GC，避免上一轮留下的垃圾在这一轮被回收，干扰计时
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            func(n)
+            timings.append(time.perf_counter_ns() - start)
+        finally:
+            gc.enable()
+    timings.sort()
+
+    result = {
+        "case": name,
+        "n": n,
+        "repeat": repeat,
+        "median_ns": statistics.median(timings),
+        "p95_ns": _percentile(timings, 95),
+        "min_ns": timings[0],
+        "timings_ns": timings,
+    }
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func(n)
+            result["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    result["peak_rss_bytes"] = _peak_rss_bytes()
+    return result
+
+
+def run_cases(names=None, n=1_000_000, warmup=1, repeat=5, trace_memory=True):
+    """按顺序运行多个用例；names 为 None 时运行全部已注册用例。"""
+    return [run_case(name, n, warmup, repeat, trace_memory) for name in (names or registered_cases())]
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "build": " ".join(platform.python_build()),
+        "gil_enabled": sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True,
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+    }
+
+
+def write_json(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+def print_report(results, baseline=None):
+    """打印结果表；baseline 是旧 JSON 里的 results，给出时多打印一列“新/旧”中位数比值。"""
+    old = {(r["case"], r["n"]): r for r in (baseline or [])}
+    print(f"{'case':<22}{'n':>12}{'median(ms)':>12}{'p95(ms)':>12}{'peak(MB)':>10}{'vs base':>9}")
+    for r in results:
+        peak = r.get("tracemalloc_peak_bytes")
+        peak_text = f"{peak / 1024 / 1024:.1f}" if peak is not None else "-"
+        base = old.get((r["case"], r["n"]))
+        ratio = f"{r['median_ns'] / base['median_ns']:.2f}x" if base else "-"
+        print(f"{r['case']:<22}{r['n']:>12}{r['median_ns'] / 1e6:>12.2f}{r['p95_ns'] / 1e6:>12.2f}"
+              f"{peak_text:>10}{ratio:>9}")
+
+
+# --- 注册用例：原来散落在各文件里、import 时跑一次的那些对比 ---
+
+@register("for_loop")
+def _for_loop(n):
+    return test_for_loop(range(n))
+
+
+@register("comprehension")
+def _comprehension(n):
+    return test_comprehension(range(n))
+
+
+@register("generator_create")
+def _generator_create(n):
+    return test_generator(range(n))
+
+
+@register("generator_consume")
+def _generator_consume(n):
+    # deque(maxlen=0) 在 C 层面把生成器耗尽，不保留任何结果
+    deque(test_generator(range(n)), maxlen=0)
+
+
+@register("eager_list_build")
+def _eager_list_build(n):
+    return EagerList(n)
+
+
+@register("compact_list_build")
+def _compact_list_build(n):
+    return CompactEagerList(n)
+
+
+_compact_inputs = {}
+
+
+@register("compact_list_plus_one")
+def _compact_list_plus_one(n):
+    # 只计 map 本身：同样大小的输入只构建一次
+    if n not in _compact_inputs:
+        _compact_inputs.clear()
+        _compact_inputs[n] = CompactEagerList(n)
+    return _compact_inputs[n].map(lambda x: x + 1)
+
+
+@register("lazy_iterator_consume")
+def _lazy_iterator_consume(n):
+    deque(LazyIterator(n), maxlen=0)
+
+
+def _register_backend_case(backend):
+    @register(f"backend_{backend}")
+    def _case(n):
+        result = run_pipeline(plus_one, range(n), backend)
+        if backend == "generator":
+            deque(result, maxlen=0)
+        return result
+
+
+for _backend in BACKENDS:
+    _register_backend_case(_backend)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="运行已注册的基准用例")
+    parser.add_argument("cases", nargs="*", help="要运行的用例名，默认全部：" + ", ".join(registered_cases()))
+    parser.add_argument("--size", type=int, default=1_000_000, help="数据量 n")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-memory", action="store_true", help="跳过 tracemalloc 那一轮")
+    parser.add_argument("--output", help="把结果写入这个 JSON 文件")
+    parser.add_argument("--compare", help="和之前保存的 JSON 结果对比")
+    args = parser.parse_args()
+
+    results = run_cases(args.cases or None, args.size, args.warmup, args.repeat, not args.no_memory)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_report(results, baseline)
+    if args.output:
+        write_json(results, args.output)
@@ -0,0 +1,60 @@
+"""
+按块调度：把输入切成块、交给线程池 / 进程池执行，同时在路上的块数有上限。
+
+comprehensions.py 的 parallel_safe_processor、stream.py 的并行后端、log_grep.py 的 parallel_grep
+都是同一个套路，这里只放一份，免得几份拷贝各改各的：
+    · chunked 把任意可迭代对象切成固定大小的 list——按块派活，一次进程间通信摊到一整块数据上；
+    · bounded_map 把块逐个提交给 executor，同一时间最多 max_in_flight 个块在路上，取走一个结果就补一个块。
+      消费者不来拉，就不再读新的输入，内存占用和数据总量无关。
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import islice
+
+
+def chunked(data_stream, chunk_size):
+    """把任意可迭代对象切成 chunk_size 大小的 list，最后一块可能不满。"""
+    iterator = iter(data_stream)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bounded_map(executor, func, next_chunk, max_in_flight, ordered=True):
+    """
+    把 next_chunk() 给出的块逐个交给 executor 执行，同一时间最多 max_in_flight 个块在路上，结果边算边吐。
+    next_chunk() 返回 None 表示“现在没有要提交的块”：输入读完了，或者调用方暂时不想再要
+    （等调用方处理完手上的结果，下一轮还会再问一次）。
+    ordered=True 时按提交顺序吐结果；否则谁先算完先吐谁。生成器被关闭时，取消还没开始的块。
+    """
+    # 有序模式用队列（先进先出）；无序模式用集合，配合 wait() 取最先完成的
+    pending = deque() if ordered else set()
+    add_pending = pending.append if ordered else pending.add
+
+    def fill():
+        while len(pending) < max_in_flight:
+            chunk = next_chunk()
+            if chunk is None:
+                return
+            add_pending(executor.submit(func, chunk))
+
+    try:
+        while True:
+            fill()
+            if not pending:
+                return
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                pending.difference_update(done)
+            for future in done:
+                result = future.result()
+                # 取走一个块就补一个块，保持在途块数恒定：调用方处理这块结果时，后面的块已经在算了
+                fill()
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
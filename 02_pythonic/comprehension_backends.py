@@ -0,0 +1,89 @@
+"""
+同一条逐元素变换流水线，四种执行方式：for 循环、列表推导式、生成器、NumPy 向量化。
+
+comprehensions.py 第四步说过，Pandas/NumPy 的正确写法是 df['col'] + 1 而不是 [x + 1 for x in df['col']]：
+前者把整个循环交给 C 代码（还能用上 SIMD），后者每个元素都要经过一次 Python 字节码。
+但前面的基准只比较了 Python 层面的写法，这里把向量化也放进同一张对比表。
+
+流水线的定义是一串逐元素函数 steps，例如 (lambda x: x + 1, lambda x: x * 2)。
+只要每一步都是 + - * // 这类算术运算，同一个函数既能作用于单个 int，也能作用于整个 ndarray，
+所以“怎么执行”只需要一个 backend 参数来选：
+    "loop"          for + append，结果是 list
+    "comprehension" 列表推导式，结果是 list
+    "generator"     生成器表达式，结果是惰性的生成器（要消费才会算）
+    "vectorized"    每一步对整个数组做一次运算，结果是 ndarray
+没装 NumPy 时，"vectorized" 自动退回 "comprehension"，并给出一次警告。
+
+用法：
+    python comprehension_backends.py                 # 10^5、10^6、10^7
+    python comprehension_backends.py 100000000       # 自己指定数据量（10^8 的列表需要约 4GB 内存）
+"""
+import sys
+import warnings
+from functools import reduce
+
+try:
+    import numpy as np  # 可选依赖
+except ImportError:
+    np = None
+
+BACKENDS = ("loop", "comprehension", "generator", "vectorized")
+
+
+def resolve_backend(backend):
+    """检查 backend 名字；没装 NumPy 时把 "vectorized" 降级成 "comprehension"。"""
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的 backend: {backend!r}，可选: {BACKENDS}")
+    if backend == "vectorized" and np is None:
+        warnings.warn("没有安装 NumPy，vectorized 退回 comprehension", RuntimeWarning, stacklevel=3)
+        return "comprehension"
+    return backend
+
+
+def _compose(steps):
+    """把多步变换合成一个函数，Python 层面的三种写法每个元素只调用一次。"""
+    if len(steps) == 1:
+        return steps[0]
+    return lambda x: reduce(lambda acc, step: step(acc), steps, x)
+
+
+def _as_array(data):
+    if isinstance(data, range):
+        return np.arange(data.start, data.stop, data.step, dtype=np.int64)
+    return np.asarray(data)
+
+
+def run_pipeline(steps, data, backend="comprehension"):
+    """用指定的 backend 把 steps 依次作用到 data 的每个元素上。"""
+    backend = resolve_backend(backend)
+    if callable(steps):
+        steps = (steps,)
+
+    if backend == "vectorized":
+        return reduce(lambda arr, step: step(arr), steps, _as_array(data))
+
+    func = _compose(tuple(steps))
+    if backend == "loop":
+        res = []
+        for x in data:
+            res.append(func(x))
+        return res
+    if backend == "comprehension":
+        return [func(x) for x in data]
+    return (func(x) for x in data)
+
+
+def plus_one(x):
+    """test_comprehension 里的那个 x + 1。"""
+    return x + 1
+
+
+if __name__ == "__main__":
+    from benchmark import print_report, run_cases
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10**5, 10**6, 10**7]
+    if np is None:
+        print("(没有安装 NumPy：backend_vectorized 实际跑的是推导式)")
+    for n in sizes:
+        print(f"\n--- n = {n} ---")
+        print_report(run_cases([f"backend_{name}" for name in BACKENDS], n=n, repeat=3))
@@ -134,61 +134,57 @@ DATA_SIZE = 10**7  # 1千万数据量，足以拉开性能差距
 # 模拟一个巨大的数据源（不会占用太多内存，因为range是懒惰的）
 huge_data = range(DATA_SIZE)
 
-def test_for_loop():
+def test_for_loop(data=huge_data):
     """传统 For 循环"""
     res = []
-    for x in huge_data:
+    for x in data:
         # 模拟一个极小的计算：x + 1
         res.append(x + 1)
     return res
 
-def test_comprehension():
+def test_comprehension(data=huge_data):
     """列表推导式"""
-    return [x + 1 for x in huge_data]
+    return [x + 1 for x in data]
 
-def test_generator():
+def test_generator(data=huge_data):
     """生成器表达式 (注意是圆括号)"""
-    return (x + 1 for x in huge_data)
+    return (x + 1 for x in data)
 
-# --- 1. 性能/速度 对比 ---
-print(f"--- 开始性能测试 (数据量: {DATA_SIZE}) ---")
+# 只有直接运行本文件时才跑对比实验；被 import（例如多进程子进程重新导入本模块）时不执行
+if __name__ == "__main__":
+    # --- 1. 性能/速度 对比 ---
+    # 单次 time.time() 相减的数字噪声很大（CPU 降频、GC、其他进程都会干扰），
+    # 这里交给 benchmark.py：先预热，再重复多次，看中位数和 p95
+    from benchmark import run_cases, print_report
+
+    print(f"--- 开始性能测试 (数据量: {DATA_SIZE}) ---")
+    print_report(run_cases(["for_loop", "comprehension", "generator_create"], n=DATA_SIZE, repeat=3))
 
-# 测试 For 循环
-start = time.time()
-res_for = test_for_loop()
-end = time.time()
-print(f"1. For 循环耗时: {end - start:.4f} 秒")
+    res_comp = test_comprehension()
 
-# 测试 推导式
-start = time.time()
-res_comp = test_comprehension()
-end = time.time()
-print(f"2. 推导式耗时 : {end - start:.4f} 秒")
+    # --- 2. 内存/底层机制 对比 ---
+    print(f"\n--- 内存占用与机制对比 ---")
 
-# --- 2. 内存/底层机制 对比 ---
-print(f"\n--- 内存占用与机制对比 ---")
+    # 计算列表对象的内存大小 (不包含元素本身，只看容器结构)
+    # 注意：这是推导式生成的实体列表
+    size_list = sys.getsizeof(res_comp)
+    print(f"列表推导式对象大小: {size_list / 1024 / 1024:.2f} MB (只是外壳：{DATA_SIZE} 个 8 字节指针)")
 
-# 计算列表对象的内存大小 (不包含元素本身，只看容器结构)
-# 注意：这是推导式生成的实体列表
-size_list = sys.getsizeof(res_comp)
-print(f"列表推导式对象大小: {size_list / 1024 / 1024:.2f} MB (已全部加载到内存)")
+    # 指针指向的 int 对象才是大头，要沿着引用把每个元素都算上（见 memory_profile.py）
+    from memory_profile import deep_sizeof
+    print(f"列表推导式真实占用: {deep_sizeof(res_comp) / 1024 / 1024:.2f} MB (外壳 + 所有元素对象，已全部加载到内存)")
 
-# 测试生成器
-start = time.time()
-res_gen = test_generator()
-end = time.time()
-# 注意：这里时间几乎为0，因为它根本没开始干活
-print(f"3. 生成器创建耗时: {end - start:.4f} 秒 (极快)")
+    # 生成器创建几乎不花时间（见上面 generator_create 的耗时），因为它根本没开始干活
+    res_gen = test_generator()
 
-size_gen = sys.getsizeof(res_gen)
-print(f"生成器表达式对象大小: {size_gen} Bytes (极小，无论数据量多少)")
+    size_gen = sys.getsizeof(res_gen)
+    print(f"生成器表达式对象大小: {size_gen} Bytes (极小，无论数据量多少)")
 
-# --- 3. 验证生成器是'懒'的 ---
-print(f"生成器当前并没有计算结果，直到我们通过 next() 索要数据: {next(res_gen)}")
+    # --- 3. 验证生成器是'懒'的 ---
+    print(f"生成器当前并没有计算结果，直到我们通过 next() 索要数据: {next(res_gen)}")
 
-# 清理内存，防止笔记本卡死
-del res_for
-del res_comp
+    # 清理内存，防止笔记本卡死
+    del res_comp
 
 # 异常推演（Thought Experiment）
 """
@@ -236,6 +232,16 @@ C	Stream Pipeline (生成器流)	(func(x) for x in data)	惰性计算，用多
 """
 import time
 import random
+import json
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from chunking import bounded_map, chunked
+from pipeline_stage import BackgroundStage, WorkerError
+
+logger = logging.getLogger(__name__)
 
 # 模拟：偶尔会出错的业务逻辑
 def risky_process(x):
@@ -244,33 +250,287 @@ def risky_process(x):
         raise ValueError(f"Bad Data: {x}")
     return x * 2
 
+# --- 可观测性：失败去哪了？跑得快不快？ ---
+"""
+“跳过坏数据”不等于“扔掉坏数据”。生产环境至少要回答两个问题：
+    1. 哪些数据坏了、为什么坏？—— 交给“失败收集器（Failure Sink）”。
+       收集器就是一个可调用对象 sink(item, exc)，所以普通函数可以直接当回调用；
+       这里另外提供两种常用实现：内存环形缓冲（只留最近 N 条）和 JSONL 死信文件（事后可以重放）。
+    2. 现在跑到哪了、吞吐掉没掉？—— 交给“实时计数器（PipelineMetrics）”。
+       它是一个普通对象，生成器边跑边更新，消费者随时可以读，不用等流水线结束。
+"""
+def _failure_record(item, exc):
+    """把一次失败整理成结构化记录。"""
+    return {
+        "time": time.time(),
+        "item": item,
+        "error": getattr(exc, "type_name", type(exc).__name__),
+        "message": str(exc),
+    }
+
+class RingBufferSink:
+    """内存环形缓冲：只保留最近 maxlen 条失败记录，内存有上限；total 记录一共收到多少条。"""
+    def __init__(self, maxlen=1000):
+        self.records = deque(maxlen=maxlen)
+        self.total = 0
+
+    def __call__(self, item, exc):
+        self.total += 1
+        self.records.append(_failure_record(item, exc))
+
+class JsonlDeadLetterSink:
+    """死信文件：每条失败追加一行 JSON。行缓冲写入，进程崩溃时最多丢最后半行。"""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def __call__(self, item, exc):
+        # item 不一定能被 JSON 序列化，兜底用 repr
+        self._file.write(json.dumps(_failure_record(item, exc), ensure_ascii=False, default=repr) + "\n")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class LatencyHistogram:
+    """按 2 的幂分桶的延迟直方图（单位纳秒）：第 i 个桶统计 [2^(i-1), 2^i) 纳秒的样本，记录一次只是一次列表下标加法。"""
+    def __init__(self):
+        self.counts = [0] * 64
+        self.total = 0
+
+    def record(self, ns, count=1):
+        self.counts[min(int(ns).bit_length(), 63)] += count
+        self.total += count
+
+    def percentile(self, p):
+        """返回第 p 百分位所在桶的上界（纳秒），是一个偏保守的近似值。"""
+        if not self.total:
+            return 0
+        threshold = self.total * p / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= threshold:
+                return 1 << i
+        return 1 << 63
+
+class PipelineMetrics:
+    """
+    流水线的实时计数器：success / failed 随处理进度实时累加，消费者中途随时可读。
+    track_latency=True 时额外记录 risky_process 的延迟直方图（每个元素多两次 perf_counter_ns 调用）。
+    """
+    def __init__(self, track_latency=True):
+        self.success = 0
+        self.failed = 0
+        self.track_latency = track_latency
+        self.latency = LatencyHistogram()
+        self.started_at = None
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+    @property
+    def processed(self):
+        return self.success + self.failed
+
+    @property
+    def elapsed(self):
+        return 0.0 if self.started_at is None else time.perf_counter() - self.started_at
+
+    @property
+    def items_per_sec(self):
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed else 0.0
+
+    @property
+    def failure_rate(self):
+        return self.failed / self.processed if self.processed else 0.0
+
+    def snapshot(self):
+        """当前状态的一份字典快照，方便打日志或上报监控。"""
+        snap = {
+            "success": self.success,
+            "failed": self.failed,
+            "failure_rate": self.failure_rate,
+            "items_per_sec": self.items_per_sec,
+            "elapsed": self.elapsed,
+        }
+        if self.track_latency:
+            snap["latency_p50_ns"] = self.latency.percentile(50)
+            snap["latency_p99_ns"] = self.latency.percentile(99)
+        return snap
+
+    def summary(self):
+        text = (f"成功 {self.success}, 失败 {self.failed} (失败率 {self.failure_rate:.2%}), "
+                f"吞吐 {self.items_per_sec:,.0f} 条/秒")
+        if self.track_latency:
+            text += f", 延迟 p50≈{self.latency.percentile(50)}ns p99≈{self.latency.percentile(99)}ns"
+        return text
+
+def _report_failure(sink, item, exc):
+    if sink is None:
+        logger.debug("[Log] Skipping error: %s", exc)
+    else:
+        sink(item, exc)
+
+def _record_chunk(metrics, sink, results, failures, elapsed_ns):
+    """把一个块的处理结果记到计数器和失败收集器里（批量版、多进程版共用）。"""
+    size = len(results) + len(failures)
+    metrics.success += len(results)
+    metrics.failed += len(failures)
+    if metrics.track_latency and size:
+        # 块内只计了总耗时，按平均值摊到每个元素上
+        metrics.latency.record(elapsed_ns // size, size)
+    for item, exc in failures:
+        _report_failure(sink, item, exc)
+
 # --- 架构师的封装：防御性生成器 ---
-def safe_processor(data_stream):
+def safe_processor(data_stream, workers=None, chunk_size=1000, ordered=True, sink=None, metrics=None):
     """
     这是一个生成器函数（Generator Function）。
     它像一个传送带，负责把原料加工好，同时剔除次品。
+
+    默认单进程逐个处理；传入 workers 时切换到多进程模式（见 parallel_safe_processor），
+    chunk_size / ordered 只在多进程模式下生效。
+    sink 收集失败的数据和异常；metrics 是调用方持有的 PipelineMetrics，可以边消费边读。
     """
-    success_count = 0
-    fail_count = 0
-    
-    for item in data_stream:
-        try:
-            # 尝试处理数据
-            result = risky_process(item)
+    if metrics is None:
+        metrics = PipelineMetrics(track_latency=False)
+    if workers:
+        yield from parallel_safe_processor(data_stream, workers, chunk_size, ordered, sink=sink, metrics=metrics)
+        return
+
+    metrics.start()
+    track_latency = metrics.track_latency
+    clock = time.perf_counter_ns
+    try:
+        for item in data_stream:
+            started = clock() if track_latency else 0
+            try:
+                # 尝试处理数据
+                result = risky_process(item)
+            except Exception as e:
+                # 失败了，交给失败收集器，但不要中断整个循环！
+                metrics.failed += 1
+                _report_failure(sink, item, e)
+                continue
+            finally:
+                if track_latency:
+                    metrics.latency.record(clock() - started)
+            metrics.success += 1
             # 成功了，通过 yield 吐出数据
             yield result
-            success_count += 1
+    finally:
+        # 放在 finally 里：消费者提前 break / close 时，总结一样会输出
+        logger.info("--- 处理总结: %s ---", metrics.summary())
+
+# --- 进阶：多进程版传送带 ---
+"""
+safe_processor 只用得上一个 CPU 核：risky_process 是纯计算，受 GIL 限制，开线程没用，只能开进程。
+但进程间通信（pickle 序列化 + 管道传输）很贵，如果每个元素都单独发给子进程，通信成本会远远超过计算本身。
+所以要“按块派活”：
+    1. 把输入流切成 chunk_size 大小的块，每块作为一个任务丢给 ProcessPoolExecutor。
+    2. 同一时间最多只有 max_in_flight 个块在路上（默认 workers * 2），
+       消费者不来拉，就不再读新的输入——内存占用和单进程生成器一样是恒定的。
+    3. ordered=True 时按提交顺序取结果，输出顺序与输入一致；
+       ordered=False 时谁先算完先吐谁，慢块不会堵住后面的快块，吞吐更高。
+切块和限流这两段（chunked / bounded_map）放在 chunking.py 里，stream.py、log_grep.py 的并行版本也用同一份。
+注意：risky_process 和 _process_chunk_in_worker 必须定义在模块顶层，子进程才能通过 pickle 找到它们；
+失败的数据也要 pickle 回主进程再交给 sink，所以异常先在子进程里换成只含类型名和消息的 WorkerError（见 pipeline_stage.py）。
+"""
+def _process_items(chunk):
+    """慢路径：逐个 try/except 处理一整块数据，返回 (成功结果列表, [(失败元素, 异常), ...])。"""
+    results = []
+    failures = []
+    for item in chunk:
+        try:
+            results.append(risky_process(item))
         except Exception as e:
-            # 失败了，捕获异常，打印日志，但不要中断整个循环！
-            fail_count += 1
-            # 在生产环境，这里应该写 log 文件
-            # print(f"[Log] Skipping error: {e}") 
-            continue
-            
-    print(f"--- 处理总结: 成功 {success_count}, 失败 {fail_count} ---")
+            failures.append((item, e))
+    return results, failures
+
+def _process_chunk(chunk):
+    """
+    快速路径：整块数据直接走一次列表推导式（没有逐个 try/except 的开销）；
+    只要块里有一个元素抛异常，就丢掉这块的半成品，退回 _process_items 逐个处理。
+    返回 (成功结果列表, 失败列表, 整块耗时纳秒)。
+    """
+    started = time.perf_counter_ns()
+    try:
+        results, failures = [risky_process(item) for item in chunk], []
+    except Exception:
+        results, failures = _process_items(chunk)
+    return results, failures, time.perf_counter_ns() - started
+
+def _process_chunk_in_worker(chunk):
+    """多进程版交给子进程的任务：和 _process_chunk 一样，只是把失败里的异常换成可以安全 pickle 的 WorkerError。"""
+    results, failures, elapsed_ns = _process_chunk(chunk)
+    failures = [(item, WorkerError(type(e).__name__, str(e))) for item, e in failures]
+    return results, failures, elapsed_ns
+
+def parallel_safe_processor(data_stream, workers=None, chunk_size=1000, ordered=True, max_in_flight=None,
+                            sink=None, metrics=None):
+    """
+    safe_processor 的多进程版本：同样是生成器，同样“跳过坏数据、统计失败数”。
+    workers 为 None 时使用 os.cpu_count() 个进程。
+    """
+    if max_in_flight is None:
+        max_in_flight = (workers or os.cpu_count() or 1) * 2
+    if metrics is None:
+        metrics = PipelineMetrics(track_latency=False)
+
+    chunks = chunked(data_stream, chunk_size)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    metrics.start()
+    try:
+        for results, failures, elapsed_ns in bounded_map(executor, _process_chunk_in_worker,
+                                                         partial(next, chunks, None), max_in_flight, ordered):
+            _record_chunk(metrics, sink, results, failures, elapsed_ns)
+            yield from results
+    finally:
+        # 消费者提前退出（break / close）时，取消还没开始的块，不再浪费 CPU
+        executor.shutdown(wait=True, cancel_futures=True)
+        logger.info("--- 处理总结: %s ---", metrics.summary())
+
+# --- 进阶：批量版传送带 ---
+"""
+safe_processor 为每个元素都要进出一次 try 块、挂起恢复一次生成器（yield），这些解释器开销是按元素算的。
+批量版把“异常隔离”的粒度从“单个元素”放大到“一块数据”（多进程版的每个块也走同一条快速路径）：
+    1. 每次从输入流取 batch_size 个元素，整块走一次列表推导式——这就是 test_comprehension 的速度。
+    2. 这一块里只要有一个元素出错，才退回到逐个 try/except 的慢路径，坏数据只拖慢它所在的那一块。
+代价：出错的块里，出错位置之前的元素会被算两遍。所以它适合“绝大多数数据是干净的”场景；
+如果错误率很高（比如演示用的 10%），几乎每块都会退回慢路径，这时 batch_size 要调小，或者直接用 safe_processor。
+"""
+def batched_safe_processor(data_stream, batch_size=1024, flatten=True, sink=None, metrics=None):
+    """
+    safe_processor 的批量版本：结果顺序、跳过坏数据、统计失败数的语义都不变。
+    flatten=False 时按块吐出结果列表：下游如果本来就是批量消费（比如数据库 executemany），
+    连“每个元素 yield 一次”的开销也省掉了。
+    """
+    if metrics is None:
+        metrics = PipelineMetrics(track_latency=False)
+
+    metrics.start()
+    try:
+        for batch in chunked(data_stream, batch_size):
+            results, failures, elapsed_ns = _process_chunk(batch)
+            _record_chunk(metrics, sink, results, failures, elapsed_ns)
+            if flatten:
+                yield from results
+            elif results:
+                yield results
+    finally:
+        logger.info("--- 处理总结: %s ---", metrics.summary())
 
 # --- 客户端调用 ---
 def main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     data = range(100) # 假设这是 1 亿条数据
     
     # 1. 创建流水线 (注意：此时没有执行任何逻辑，瞬间完成)
@@ -280,9 +540,29 @@ def main():
     
     # 2. 消费数据 (可以是写入数据库、写入文件)
     # 只有在这里，risky_process 才会真正被执行
-    valid_results = list(pipeline) 
+    # 不要 list(pipeline)：那会把所有结果又装回内存。生产者放到后台线程，通过有界队列交给消费者，
+    # 消费者写库的同时生产者在算下一批，内存上限是队列深度（见 pipeline_stage.py）
+    valid_count = 0
+    for row in BackgroundStage(lambda: pipeline, maxsize=4, batch_size=16):
+        valid_count += 1  # 这里换成写入数据库
     
-    print(f"最终获取有效结果数: {len(valid_results)}")
+    print(f"最终获取有效结果数: {valid_count}")
+
+    # 3. 批量模式：干净数据整块走推导式，只有出错的块才逐个处理
+    batched_results = list(batched_safe_processor(data, batch_size=16))
+    print(f"批量模式有效结果数: {len(batched_results)}")
+
+    # 4. 多进程模式：同样的接口，多传一个 workers 就能吃满多核
+    parallel_results = list(safe_processor(data, workers=4, chunk_size=10))
+    print(f"多进程模式有效结果数: {len(parallel_results)}")
+
+    # 5. 可观测性：失败明细进环形缓冲，计数器在消费过程中随时可读
+    sink = RingBufferSink(maxlen=5)
+    metrics = PipelineMetrics()
+    for i, _ in enumerate(safe_processor(range(10_000), sink=sink, metrics=metrics)):
+        if i == 5_000:
+            print(f"消费到一半时的实时指标: {metrics.snapshot()}")
+    print(f"最近 {len(sink.records)} 条失败（共 {sink.total} 条）: {[r['message'] for r in sink.records]}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,211 @@
+"""
+上下文管理器与 with 语句。
+
+    with open(path) as f:
+        data = f.read()
+
+等价于：
+    mgr = open(path)
+    f = mgr.__enter__()
+    try:
+        data = f.read()
+    finally:
+        mgr.__exit__(...)     # 不管有没有异常都会执行，文件的 __exit__ 就是 close()
+
+任何实现了 __enter__ / __exit__ 的对象都能放进 with。“进入时拿资源，退出时还资源”不一定是“打开/关闭”，
+也可以是“从池里借/还回池里”。
+
+--- 文件句柄池 ---
+仓库里的 I/O 例子每次都是一个新的 open('huge_log.txt')。读一个大文件时这没问题；
+但如果任务要反复读成千上万个小文件，每次 open + close 都是两次系统调用（还有路径解析、分配文件描述符、
+创建 Python 文件对象），可能比读内容本身还贵。
+
+FileHandlePool 让 with 语句“借”句柄而不是“打开”句柄：
+    · with pool.open(path) as f：池里有这个文件的空闲句柄就直接借出（seek(0) 回到开头，和新打开的一样），
+      没有才真的 open；with 结束时句柄还回池里，不关闭；
+    · 句柄按 (path, mode, 其他参数) 区分，"r" 和 "rb" 是两个不同的句柄；
+      "w" 模式的句柄复用时会 seek(0) + truncate()，和重新 open(path, "w") 的效果一样；
+      写模式归还时先 flush()，别的读者马上能看到写入的内容；
+    · 进程能打开的文件数是有限的（ulimit -n，常见 1024），所以池打开的句柄总数（空闲的 + 借出去的）最多 max_open 个。
+      到上限时要打开新文件，先关掉“最久没被用过”的空闲句柄（LRU，用 OrderedDict 实现，和 decorators.py 的 memoize 一样）；
+      一个空闲的都没有（全被借走了），就等别人归还——可以用 timeout 设一个最长等待时间，超时抛 TimeoutError。
+      注意：同一个线程嵌套借用超过 max_open 个句柄会一直等下去；
+    · 同一个文件同时被两个 with 借用时（比如嵌套或多线程），第二个拿到的是另外打开的新句柄（同样计入 max_open），
+      用完就关，互不干扰；
+    · stats() 给出真实 open 次数、close 次数，以及复用次数——每次复用就省下一次 open 和一次 close。
+池的内部状态用一把锁保护，可以在多线程里共用；但同一个句柄同一时刻只会借给一个人。
+
+模块级的 pooled_open(path, mode) 使用一个默认的全局池，用法和 open 一样：
+    with pooled_open(path) as f:
+        data = f.read()
+"""
+import os
+import threading
+from collections import Counter, OrderedDict
+
+
+class _Lease:
+    """一次借用：with 进入时返回文件对象，退出时把句柄还给池。"""
+
+    __slots__ = ("_pool", "_key", "_file")
+
+    def __init__(self, pool, key, file):
+        self._pool = pool
+        self._key = key
+        self._file = file
+
+    def __enter__(self):
+        return self._file
+
+    def __exit__(self, exc_type, exc, tb):
+        self._pool._release(self._key, self._file)
+
+
+class FileHandlePool:
+    """最多同时打开 max_open 个文件句柄（空闲 + 借出），空闲句柄按 LRU 关闭。"""
+
+    def __init__(self, max_open=128, timeout=None):
+        if max_open < 1:
+            raise ValueError("max_open 至少为 1")
+        self.max_open = max_open
+        self.timeout = timeout  # 句柄全被借走时，open() 最多等多少秒；None 表示一直等
+        self._idle = OrderedDict()  # key -> 空闲的文件对象，最近用过的在末尾
+        self._busy = Counter()  # key -> 借出去的句柄数（同一个文件可以同时借出多个）
+        self._borrowed = 0  # 借出去的 + 正在打开的句柄数，和 len(_idle) 一起受 max_open 限制
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self.opens = 0
+        self.closes = 0
+        self.reuses = 0
+
+    def open(self, path, mode="r", **kwargs):
+        """借一个句柄：with pool.open(path, mode) as f。参数和内置 open 相同。"""
+        key = (os.fspath(path), mode, tuple(sorted(kwargs.items())))
+        to_close = []
+        with self._lock:
+            file = self._idle.pop(key, None)
+            if file is not None:
+                self.reuses += 1
+                self._busy[key] += 1
+                self._borrowed += 1
+            else:
+                # 要新开一个：到上限时先关最久没用的空闲句柄，没有空闲的就等别人归还
+                while len(self._idle) + self._borrowed >= self.max_open:
+                    if self._idle:
+                        to_close.append(self._idle.popitem(last=False)[1])
+                    elif not self._released.wait(self.timeout):
+                        raise TimeoutError(f"等待空闲句柄超时（max_open={self.max_open}）")
+                self.closes += len(to_close)
+                self._borrowed += 1  # 先占住名额，真正的 open 在锁外面做
+        for f in to_close:
+            f.close()
+        if file is None:
+            try:
+                file = open(key[0], mode, **kwargs)
+            except BaseException:
+                with self._lock:
+                    self._borrowed -= 1
+                    self._released.notify()
+                raise
+            with self._lock:
+                self.opens += 1
+                self._busy[key] += 1
+        else:
+            file.seek(0)
+            if "w" in mode:
+                file.truncate()
+        return _Lease(self, key, file)
+
+    def _release(self, key, file):
+        to_close = None
+        if not file.closed and file.writable():
+            file.flush()
+        with self._lock:
+            self._busy[key] -= 1
+            if not self._busy[key]:
+                del self._busy[key]
+            self._borrowed -= 1
+            if file.closed:
+                # 借用的人自己把它关了，那就不回收了
+                pass
+            elif key in self._idle:
+                # 同一个 key 借出去了两个句柄（嵌套/多线程），池里只留一个
+                to_close = file
+                self.closes += 1
+            else:
+                self._idle[key] = file
+            self._released.notify()
+        if to_close is not None:
+            to_close.close()
+
+    def close_all(self):
+        """关闭所有空闲句柄（正被借用的不受影响，还回来时会照常入池）。"""
+        with self._lock:
+            files = list(self._idle.values())
+            self._idle.clear()
+            self.closes += len(files)
+            self._released.notify_all()
+        for f in files:
+            f.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "open_now": len(self._idle) + sum(self._busy.values()),
+                "opens": self.opens,
+                "closes": self.closes,
+                "reuses": self.reuses,
+                "saved_syscalls": self.reuses * 2,  # 每次复用省下一次 open 和一次 close
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_all()
+
+
+_default_pool = FileHandlePool()
+
+
+def pooled_open(path, mode="r", **kwargs):
+    """用全局默认池借一个句柄，with pooled_open(path) as f 的用法和 with open(path) as f 一样。"""
+    return _default_pool.open(path, mode, **kwargs)
+
+
+def pool_stats():
+    return _default_pool.stats()
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+
+    n_files, n_reads = 500, 50_000
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(n_files):
+            path = os.path.join(tmp, f"part-{i:04d}.txt")
+            with open(path, "w") as f:
+                f.write(f"config {i}\n" * 10)
+            paths.append(path)
+        rng = random.Random(0)
+        schedule = [rng.choice(paths) for _ in range(n_reads)]
+
+        start = time.perf_counter()
+        expected = 0
+        for path in schedule:
+            with open(path) as f:
+                expected += len(f.read())
+        print(f"{'每次 open':<24} {time.perf_counter() - start:.3f}s  ({n_reads} 次 open + {n_reads} 次 close)")
+
+        for max_open in (n_files, n_files // 5):
+            with FileHandlePool(max_open=max_open) as pool:
+                start = time.perf_counter()
+                total = 0
+                for path in schedule:
+                    with pool.open(path) as f:
+                        total += len(f.read())
+                elapsed = time.perf_counter() - start
+                print(f"{f'FileHandlePool({max_open})':<24} {elapsed:.3f}s  结果一致: {total == expected}  {pool.stats()}")
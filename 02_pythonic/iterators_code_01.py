@@ -1,11 +1,68 @@
 import sys
 import time
+from array import array
+
+try:
+    import numpy as np  # 可选依赖：装了就用 NumPy，没装就退回标准库 array
+except ImportError:
+    np = None
 
 # 选手A 传统的列表
 class EagerList:
     def __init__(self, n):
         self.data = [i for i in range(n)]
 
+# 选手A' 紧凑版列表
+class CompactEagerList:
+    """
+    EagerList 的列表里存的是 n 个指针，每个指针指向一个独立的 int 对象：8 字节指针 + 28 字节对象头和数值。
+    如果数据本来就是 64 位整数，完全可以像 C 数组一样连续存放“裸数值”，每个元素只要 8 字节。
+    底层用 NumPy 的 int64 数组（装了 NumPy 时）或者标准库的 array('q')，对外提供和列表一样的 len / 下标 / 遍历。
+    代价：取出一个元素时要临时“装箱”成 Python int，所以逐个访问并不比列表快；真正快的是 map 这种整块运算。
+    """
+    def __init__(self, n=0, use_numpy=None):
+        if use_numpy is None:
+            use_numpy = np is not None
+        self.data = np.arange(n, dtype=np.int64) if use_numpy else array("q", range(n))
+
+    @classmethod
+    def _wrap(cls, data):
+        compact = cls.__new__(cls)
+        compact.data = data
+        return compact
+
+    @property
+    def nbytes(self):
+        """数值本身占用的字节数（不含对象头），约等于 len * 8。"""
+        return len(self.data) * self.data.itemsize
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._wrap(self.data[index])  # NumPy 切片是视图，不拷贝；array 切片会拷贝
+        return int(self.data[index])
+
+    def __iter__(self):
+        if isinstance(self.data, array):
+            return iter(self.data)
+        # 逐个迭代 ndarray 会得到 np.int64 标量，又慢又不是 int；按块转成 list 再吐出
+        return (x for start in range(0, len(self.data), 65536) for x in self.data[start:start + 65536].tolist())
+
+    def map(self, func):
+        """
+        整块变换，返回新的 CompactEagerList，例如 compact.map(lambda x: x + 1)。
+        NumPy 后端把整个数组一次性交给 func（运算符在 C 层面逐元素执行），所以 func 只能用 + - * // 这类算术运算；
+        array 后端退回逐元素调用 func。
+        """
+        if isinstance(self.data, array):
+            return self._wrap(array("q", map(func, self.data)))
+        return self._wrap(np.asarray(func(self.data), dtype=np.int64))
+
+    def tolist(self):
+        return self.data.tolist()
+
 # 选手B 手写迭代器
 class LazyIterator:
     def __init__(self, n) -> None:
@@ -22,4 +79,3 @@ class LazyIterator:
             return num
         else:
             raise StopIteration # 信号：没货了，别拧了
-
@@ -55,16 +55,17 @@ class LazyRangeIterator: # 这是迭代器
     def __iter__(self): # 迭代器本身可迭代，返回自身
         return self
 
-# 演示：
-my_range = LazyRangeIterable(3) # 这是可迭代对象
+if __name__ == "__main__":
+    # 演示：
+    my_range = LazyRangeIterable(3) # 这是可迭代对象
 
-# 第一次迭代
-iter1 = iter(my_range) # 获取一个新的迭代器
-print(list(iter1)) # [0, 1, 2]
+    # 第一次迭代
+    iter1 = iter(my_range) # 获取一个新的迭代器
+    print(list(iter1)) # [0, 1, 2]
 
-# 第二次迭代 (从头开始)
-iter2 = iter(my_range) # 再次获取一个新的迭代器
-print(list(iter2)) # [0, 1, 2]
+    # 第二次迭代 (从头开始)
+    iter2 = iter(my_range) # 再次获取一个新的迭代器
+    print(list(iter2)) # [0, 1, 2]
 
-# 注意：iter1 的状态已经被消耗，而 iter2 是全新的
-print(list(iter1)) # []
+    # 注意：iter1 的状态已经被消耗，而 iter2 是全新的
+    print(list(iter1)) # []
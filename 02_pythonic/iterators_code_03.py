@@ -0,0 +1,173 @@
+### 断点续传：让迭代器的“游标”活过进程崩溃
+
+"""
+`iterators.py` 的异常推演里提过：`LazyIterator` 的状态只有内存里的 `self.current`，
+进程一崩溃，游标就没了，重启后只能从 0 开始重新处理。
+
+解决思路和 Kafka 的 Consumer Offset 一样：**把游标定期提交（commit）到外部存储**。
+
+1.  **什么时候算“处理完”？**
+    迭代器本身不知道调用方什么时候处理完了一个元素。这里采用最常见的约定：
+    调用方来要第 k+1 个元素时，说明前 k 个已经处理完了，可以提交 offset = k。
+    崩溃时正在处理的那个元素没有被提交，重启后会再处理一遍——这是“至少一次（At-Least-Once）”语义。
+
+2.  **多久提交一次？**
+    每个元素都写一次文件太慢，所以满足任一条件才提交：距离上次提交已经过了 `every` 个元素，或者过了 `interval` 秒。
+    崩溃时最多重复处理 `every` 个元素（或 `interval` 秒内的元素）。
+
+3.  **怎么写文件才不会写坏？**
+    直接覆盖写，写到一半断电，文件就只剩半截。正确做法是“原子替换”：
+    先写到同目录下的临时文件，`fsync` 落盘，再用 `os.replace` 一步换掉旧文件。
+    `os.replace` 在同一个文件系统内是原子的：读到的要么是旧 offset，要么是新 offset，不会是半截。
+
+4.  **恢复时怎么跳过已处理的部分？**
+    *   `ResumableRangeIterator`：数据是算出来的，直接把 `current` 设成 offset，O(1) 跳转。
+    *   `CheckpointedIterator`：包装任意数据源，只能从头 `islice` 跳过 offset 个元素（不用处理，只是读过去）。
+"""
+import json
+import os
+import tempfile
+import time
+from itertools import islice
+
+from iterators_code_02 import LazyRangeIterator
+
+
+def load_offset(path: str) -> int:
+    """读取上次提交的 offset；文件不存在说明是第一次运行，从 0 开始。"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["offset"]
+    except FileNotFoundError:
+        return 0
+
+
+def save_offset(path: str, offset: int) -> None:
+    """原子地写入 offset：临时文件 + fsync + os.replace。"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".offset-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"offset": offset, "time": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class Checkpoint:
+    """记录“已提交到哪里”，并按 every 个元素 / interval 秒的节奏决定要不要真正写盘。"""
+
+    def __init__(self, path: str, every: int = 1000, interval: float | None = 5.0) -> None:
+        self.path = path
+        self.every = every
+        self.interval = interval
+        self.committed = load_offset(path)
+        self._last_commit_time = time.monotonic()
+
+    def maybe_save(self, offset: int) -> None:
+        if offset <= self.committed:
+            return
+        if offset - self.committed >= self.every or (
+            self.interval is not None and time.monotonic() - self._last_commit_time >= self.interval
+        ):
+            self.save(offset)
+
+    def save(self, offset: int) -> None:
+        save_offset(self.path, offset)
+        self.committed = offset
+        self._last_commit_time = time.monotonic()
+
+
+class ResumableRangeIterator(LazyRangeIterator):
+    """会自动存档的 LazyRangeIterator：重启后直接从上次提交的 offset 继续。"""
+
+    def __init__(self, n: int, checkpoint_path: str, every: int = 1000, interval: float | None = 5.0) -> None:
+        super().__init__(n)
+        self.checkpoint = Checkpoint(checkpoint_path, every, interval)
+        self.current = min(self.checkpoint.committed, n)  # O(1) 跳转，不用重放前面的数据
+
+    def __next__(self) -> int:
+        # 调用方来要下一个，说明前 current 个已经处理完了
+        self.checkpoint.maybe_save(self.current)
+        try:
+            return super().__next__()
+        except StopIteration:
+            self.checkpoint.save(self.current)
+            raise
+
+
+class CheckpointedIterator:
+    """
+    给任意可迭代对象（文件、数据库游标、生成器……）加上断点续传。
+    恢复时只能从头跳过已提交的元素，所以要求数据源每次重新打开时顺序不变。
+    推荐配合 with 使用：正常结束时提交全部进度；处理中途出异常时只提交已经处理完的部分。
+    """
+
+    def __init__(self, source, checkpoint_path: str, every: int = 1000, interval: float | None = 5.0) -> None:
+        self.checkpoint = Checkpoint(checkpoint_path, every, interval)
+        self.position = self.checkpoint.committed  # 已经交给调用方的元素个数
+        self._acked = self.position                # 调用方确认处理完的元素个数
+        self._iterator = iter(source)
+        if self.position:
+            # 跳过已处理的部分：islice 在 C 层面空转，不会把数据交给调用方
+            next(islice(self._iterator, self.position, self.position), None)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self._acked = self.position
+        self.checkpoint.maybe_save(self._acked)
+        try:
+            item = next(self._iterator)
+        except StopIteration:
+            self.checkpoint.save(self.position)
+            raise
+        self.position += 1
+        return item
+
+    def commit(self) -> None:
+        """手动提交：调用方确认已经交出去的元素全部处理完了。"""
+        self.checkpoint.save(self.position)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 出异常时，正在处理的那个元素不算完成
+        self.checkpoint.save(self.position if exc_type is None else self._acked)
+
+
+if __name__ == "__main__":
+    checkpoint_file = os.path.join(tempfile.gettempdir(), "lazy_range.offset")
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+    # 第一次运行：每 10 个元素存档一次，处理到 17 时“崩溃”（直接 break，不做任何收尾）
+    first_run = ResumableRangeIterator(25, checkpoint_file, every=10)
+    for num in first_run:
+        if num == 17:
+            print(f"处理 {num} 时崩溃！")
+            break
+    print(f"磁盘上的 offset: {load_offset(checkpoint_file)}")  # 10
+
+    # 重启：从最后一次提交的 offset 继续，10~16 会被重复处理（At-Least-Once）
+    second_run = ResumableRangeIterator(25, checkpoint_file, every=10)
+    print(f"重启后的结果: {list(second_run)}")  # [10, 11, ..., 24]
+    print(f"跑完后的 offset: {load_offset(checkpoint_file)}")  # 25
+
+    # 包装任意数据源：处理 "c" 时抛异常，with 只提交已处理完的 "a"、"b"
+    os.remove(checkpoint_file)
+    try:
+        with CheckpointedIterator(iter("abcdef"), checkpoint_file) as letters:
+            for letter in letters:
+                if letter == "c":
+                    raise RuntimeError(f"处理 {letter} 失败")
+    except RuntimeError as e:
+        print(e)
+    with CheckpointedIterator(iter("abcdef"), checkpoint_file) as letters:
+        print(f"恢复后的结果: {list(letters)}")  # ['c', 'd', 'e', 'f']
+    os.remove(checkpoint_file)
@@ -0,0 +1,123 @@
+### 多线程共享一个迭代器：全局锁 vs 分块领取
+
+"""
+`iterators.py` 最后的思考题：`LazyIterator.__next__` 是线程安全的吗？
+
+不是。`self.current += 1` 在字节码层面是“读 -> 加 -> 写”三步，
+两个线程可能读到同一个 current，于是同一个数被发了两次（或者某个数被跳过）。
+有 GIL 时这个窗口很小但依然存在；在去掉 GIL 的 free-threaded 构建（python3.13t）上，这个竞争会频繁发生。
+
+两种修法：
+
+1.  **`LockedRangeIterator`：一把全局锁**
+    每次 `next()` 都加锁。绝对正确，但所有线程每拿一个数都要抢同一把锁，线程越多，排队越严重。
+
+2.  **`ShardedRangeIterator`：分块领取**
+    共享的只有一个“领号计数器”：线程每次领走连续的 `block_size` 个下标 `[start, end)`，
+    之后在自己的线程局部变量（`threading.local`）里慢慢消费，用完了再去领下一块。
+    Python 没有原子整数，这里的“原子领号”就是一次加锁的 fetch-and-add，
+    但它每 `block_size` 个元素才发生一次，锁竞争被摊薄了 `block_size` 倍。
+    每个下标只会被一个线程领到，所以不丢不重；代价是全局上不再严格按顺序吐出。
+    如果工作线程能一次处理一整块，用 `blocks()` 直接拿 `range`，连每个元素的线程局部变量查找都省了。
+"""
+import sys
+import threading
+import time
+
+from iterators_code_02 import LazyRangeIterator
+
+
+class LockedRangeIterator(LazyRangeIterator):
+    """基线：每次 next() 都抢同一把全局锁。"""
+
+    def __init__(self, n: int) -> None:
+        super().__init__(n)
+        self._lock = threading.Lock()
+
+    def __next__(self) -> int:
+        with self._lock:
+            return super().__next__()
+
+
+class ShardedRangeIterator(LazyRangeIterator):
+    """多个线程共享同一个实例：每个线程一次领走 block_size 个下标，在本线程内消费。"""
+
+    def __init__(self, n: int, block_size: int = 1024) -> None:
+        super().__init__(n)
+        self.block_size = block_size
+        self._claim_lock = threading.Lock()
+        self._local = threading.local()
+
+    def claim_block(self) -> range:
+        """原子地领取下一块下标；全部领完后返回空 range。"""
+        with self._claim_lock:
+            start = self.current
+            self.current = min(start + self.block_size, self.n)
+            return range(start, self.current)
+
+    def blocks(self):
+        """按块消费：每次吐出一个 range，适合能批量处理的工作线程。"""
+        while True:
+            block = self.claim_block()
+            if not block:
+                return
+            yield block
+
+    def __next__(self) -> int:
+        local = self._local
+        try:
+            num = local.next
+            end = local.end
+        except AttributeError:  # 本线程第一次调用
+            num = end = 0
+        if num >= end:
+            block = self.claim_block()
+            if not block:
+                raise StopIteration
+            num, end = block.start, block.stop
+            local.end = end
+        local.next = num + 1
+        return num
+
+
+def _consume(iterator, results, slot):
+    count = 0
+    total = 0
+    for num in iterator:
+        count += 1
+        total += num
+    results[slot] = (count, total)
+
+
+def run_benchmark(n: int = 1_000_000, thread_counts=(1, 2, 4, 8, 16, 32, 64), block_size: int = 1024):
+    """每种实现在不同线程数下消费 n 个下标，统计耗时并校验不丢不重（个数与总和都要对得上）。"""
+    gil_enabled = sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True
+    print(f"--- Python {sys.version.split()[0]}, GIL {'开启' if gil_enabled else '关闭 (free-threaded)'}, n={n} ---")
+    print(f"{'实现':<10}{'线程数':>6}{'耗时(s)':>10}{'个数':>10}{'结果':>8}")
+
+    candidates = {
+        "unsafe": lambda: LazyRangeIterator(n),
+        "locked": lambda: LockedRangeIterator(n),
+        "sharded": lambda: ShardedRangeIterator(n, block_size),
+    }
+    expected_total = n * (n - 1) // 2
+    for name, factory in candidates.items():
+        for thread_count in thread_counts:
+            iterator = factory()
+            results = [None] * thread_count
+            threads = [threading.Thread(target=_consume, args=(iterator, results, i)) for i in range(thread_count)]
+            start = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            count = sum(c for c, _ in results)
+            total = sum(s for _, s in results)
+            verdict = "OK" if count == n and total == expected_total else "丢/重!"
+            print(f"{name:<10}{thread_count:>6}{elapsed:>10.4f}{count:>10}{verdict:>8}")
+
+
+if __name__ == "__main__":
+    # 分别用 python3 和 python3.13t 运行本文件，对比 GIL 构建和 free-threaded 构建
+    run_benchmark()
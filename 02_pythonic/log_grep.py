@@ -0,0 +1,181 @@
+"""
+流式日志过滤：comprehensions.py 陷阱题里的“10GB 日志、4GB 内存，找出 ERROR 行”。
+
+答案里的生成器写法 (line for line in open(...) if 'ERROR' in line) 解决了内存问题，但它很慢：
+    1. 文本模式下，每一行都要从 bytes 解码成 str（UTF-8 解码 + 创建一个 str 对象），哪怕 99.9% 的行最后都被丢掉。
+    2. 每一行都要经过一次 Python 层面的循环和 in 判断。
+
+更快的思路是“先找关键字，再找行”：
+    · 以二进制模式一次读入一大块（比如 1MB），直接在 bytes 里用 find 搜 b"ERROR"——这是 C 层面的内存扫描，
+      没有解码、没有逐行循环。
+    · 找到一次命中，再往左右各找一个 b"\\n"，切出这一行。只有命中的行才会变成 Python 对象。
+    · 块的末尾通常切在一行中间：最后一个换行符之后的半行留到下一块开头拼起来再搜，这样跨块的行不会漏也不会重。
+    · mmap 版本连“读入块”都省了：让操作系统把文件映射进地址空间，直接在映射上 find。
+      映射的页是文件缓存，内存紧张时内核可以随时丢掉，不会 OOM。
+
+三个函数都是生成器，结果逐行惰性吐出（bytes，需要文本时由调用方自己 decode）。
+
+在 NVMe 上，单核 find 的速度先于磁盘成为瓶颈，于是还有多核版 parallel_grep：
+    · split_ranges 把文件切成若干个 range_size 大小的字节区间，每个切点都向后挪到下一个换行符之后，
+      保证没有一行被切成两半。
+    · 每个区间交给一个工作进程，工作进程自己 mmap 文件，只扫描分给它的那一段，返回这段里命中的行。
+    · 主进程按区间顺序取结果，输出顺序和文件顺序一致；同时在路上的区间最多 workers * 2 个，
+      所以每个进程的内存上限是“一个区间里的命中行”，主进程也只缓存有限个区间的结果。
+
+用法（生成一个合成日志并对比几种写法）：
+    python log_grep.py --size-mb 4096 --path /tmp/synthetic.log
+"""
+import argparse
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from chunking import bounded_map
+
+
+def naive_grep(path, pattern="ERROR"):
+    """基线：comprehensions.py 里的生成器写法，逐行解码成 str 再判断。"""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if pattern in line:
+                yield line
+
+
+def _matching_lines(buf, pattern, start, end):
+    """在 buf[start:end] 里找出所有包含 pattern 的行。要求 start 和 end 都落在行边界上。"""
+    find = buf.find
+    rfind = buf.rfind
+    pos = find(pattern, start, end)
+    while pos != -1:
+        line_start = rfind(b"\n", start, pos)
+        line_start = start if line_start == -1 else line_start + 1
+        line_end = find(b"\n", pos, end)
+        line_end = end if line_end == -1 else line_end + 1
+        yield buf[line_start:line_end]
+        # 同一行里的第二次命中不用再管，直接从下一行开始搜
+        pos = find(pattern, line_end, end)
+
+
+def grep_blocks(path, pattern=b"ERROR", block_size=1 << 20):
+    """按 block_size 大块读取二进制数据，在 bytes 上直接搜索，跨块的半行拼到下一块。"""
+    if isinstance(pattern, str):
+        pattern = pattern.encode()
+    with open(path, "rb") as f:
+        tail = b""
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            buf = tail + block if tail else block
+            cut = buf.rfind(b"\n") + 1
+            if cut:
+                yield from _matching_lines(buf, pattern, 0, cut)
+            # 最后一个换行之后的半行（或者一整块都没有换行的超长行）留到下一块
+            tail = buf[cut:]
+        if tail:
+            yield from _matching_lines(tail, pattern, 0, len(tail))
+
+
+def grep_mmap(path, pattern=b"ERROR"):
+    """把文件映射进内存，直接在映射上搜索。"""
+    if isinstance(pattern, str):
+        pattern = pattern.encode()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)  # 告诉内核要顺序读，预读更积极、用过的页更早回收
+            yield from _matching_lines(mm, pattern, 0, len(mm))
+
+
+def split_ranges(path, range_size=64 << 20):
+    """把文件切成约 range_size 大小的 [start, end) 区间，每个切点都对齐到换行符之后。"""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        start = 0
+        while start < size:
+            end = start + range_size
+            if end >= size:
+                end = size
+            else:
+                # 从 end - 1 开始读完这一行：如果 end - 1 恰好是换行符，切点不动
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _scan_range(path, pattern, byte_range):
+    """工作进程：mmap 整个文件，但只扫描 byte_range = (start, end) 这一段，返回命中的行。"""
+    start, end = byte_range
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return list(_matching_lines(mm, pattern, start, end))
+
+
+def parallel_grep(path, pattern=b"ERROR", workers=None, range_size=64 << 20):
+    """多进程扫描：按换行对齐切块，各进程 mmap 扫描自己的区间，结果按文件顺序惰性吐出。"""
+    if isinstance(pattern, str):
+        pattern = pattern.encode()
+    ranges = iter(split_ranges(path, range_size))
+    max_in_flight = (workers or os.cpu_count() or 1) * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 限流调度和 comprehensions.py 的多进程版是同一份（chunking.bounded_map），这里的“块”就是一个字节区间
+        for lines in bounded_map(executor, partial(_scan_range, path, pattern), partial(next, ranges, None),
+                                 max_in_flight):
+            yield from lines
+
+
+def make_synthetic_log(path, size_bytes, error_every=1000):
+    """生成一个约 size_bytes 大小的合成日志，每 error_every 行有一行 ERROR。返回其中 ERROR 行的个数。"""
+    lines = []
+    for i in range(10_000):
+        level = "ERROR" if i % error_every == 0 else "INFO"
+        lines.append(f"2024-01-01 12:{i // 60 % 60:02d}:{i % 60:02d} {level} request id={i} path=/api/v1/items "
+                     f"status={500 if level == 'ERROR' else 200} latency_ms={i % 997}\n")
+    chunk = "".join(lines).encode()
+    errors_per_chunk = sum(1 for line in lines if "ERROR" in line)
+    written = 0
+    errors = 0
+    with open(path, "wb") as f:
+        while written < size_bytes:
+            f.write(chunk)
+            written += len(chunk)
+            errors += errors_per_chunk
+    return errors
+
+
+def _time(label, func):
+    start = time.perf_counter()
+    count = sum(1 for _ in func())
+    elapsed = time.perf_counter() - start
+    print(f"{label:<14} 命中 {count:>10} 行, 耗时 {elapsed:8.3f}s")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="对比逐行生成器和块读取/mmap 的日志过滤速度")
+    parser.add_argument("--path", default="/tmp/synthetic.log")
+    parser.add_argument("--size-mb", type=int, default=256, help="合成日志大小（MB），测“大于内存”的场景可以设成几 GB")
+    parser.add_argument("--workers", type=int, default=None, help="parallel_grep 的进程数，默认 CPU 核数")
+    parser.add_argument("--keep", action="store_true", help="测完不删除合成日志")
+    args = parser.parse_args()
+
+    expected = make_synthetic_log(args.path, args.size_mb * 1024 * 1024)
+    print(f"--- 合成日志 {args.path}: {args.size_mb} MB, 其中 ERROR 行 {expected} ---")
+    try:
+        counts = {
+            _time("naive_grep", lambda: naive_grep(args.path)),
+            _time("grep_blocks", lambda: grep_blocks(args.path)),
+            _time("grep_mmap", lambda: grep_mmap(args.path)),
+            _time("parallel_grep", lambda: parallel_grep(args.path, workers=args.workers)),
+        }
+        print("各写法结果一致" if counts == {expected} else f"结果不一致！{counts}")
+    finally:
+        if not args.keep:
+            os.remove(args.path)
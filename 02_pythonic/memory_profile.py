@@ -0,0 +1,165 @@
+"""
+内存测量工具：回答“这个列表到底占多少内存”。
+
+comprehensions.py 和 iterators.py 里都用 sys.getsizeof 估算列表大小，但 getsizeof 只算容器“外壳”：
+一个 1000 万元素的列表，外壳只是 1000 万个 8 字节指针（约 80MB），
+指针指向的 1000 万个 int 对象（每个 28 字节起）一个字节都没算进去。
+
+这个模块提供三件工具：
+    1. deep_sizeof(obj)：沿着引用关系把对象图走一遍，把每个对象只算一次。
+       · 小整数（-5 ~ 256）、None/True/False 是解释器全局共享的单例，删掉你的列表它们也不会释放，不计入。
+       · 类型、模块、函数、代码对象同理，不计入。
+       · 去重需要记录见过的对象 id，这个集合本身就很占内存。所以这里有个优化：
+         如果一个对象的引用计数表明它只被当前父容器引用，那它不可能被第二次走到，不用进集合。
+         像推导式结果这种“元素都是新建对象”的列表，几乎不需要去重集合。
+    2. PeakMemory：with 块内的内存峰值。tracemalloc 给出 Python 分配的精确峰值；
+       另开一个线程按固定间隔采样进程 RSS（Linux 的 /proc/self/statm），看操作系统视角的峰值。
+    3. measure_pipeline(make_iterable)：把生成器流水线完整消费一遍（不保留结果），测量过程中的峰值。
+       生成器的“大小”不是它对象本身，而是它运行时同时存活的数据量。
+"""
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+from collections import deque
+from types import BuiltinFunctionType, CodeType, FunctionType, ModuleType
+
+_SKIP_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType, CodeType)
+# 不含任何引用的原子类型：不用再往下走
+_ATOMIC_TYPES = frozenset({int, float, complex, str, bytes, bool, type(None)})
+
+
+def _sole_owner_refcount():
+    """
+    标定：只被一个容器引用的对象，在下面 deep_sizeof 的遍历循环里 sys.getrefcount 看到的值
+    （父容器 + get_referents 返回的临时列表 + 循环变量 + getrefcount 的参数）。
+    free-threaded 构建的引用计数不精确，返回 0 表示“永远用集合去重”。
+    """
+    if hasattr(sys, "_is_gil_enabled") and not sys._is_gil_enabled():
+        return 0
+    container = [object()]
+    for child in gc.get_referents(container):
+        return sys.getrefcount(child)
+
+
+_SOLE_OWNER_REFCOUNT = _sole_owner_refcount()
+
+
+def _is_shared_singleton(obj):
+    return obj is None or obj is True or obj is False or (type(obj) is int and -5 <= obj <= 256)
+
+
+def deep_sizeof(obj):
+    """obj 以及它能引用到的所有对象的总字节数，每个对象只算一次，共享单例不算。"""
+    getsizeof = sys.getsizeof
+    getrefcount = sys.getrefcount
+    sole_owner = _SOLE_OWNER_REFCOUNT
+    seen = {id(obj)}
+    total = getsizeof(obj)
+    stack = [obj]
+    while stack:
+        for child in gc.get_referents(stack.pop()):
+            if isinstance(child, _SKIP_TYPES) or _is_shared_singleton(child):
+                continue
+            if getrefcount(child) > sole_owner:
+                child_id = id(child)
+                if child_id in seen:
+                    continue
+                seen.add(child_id)
+            total += getsizeof(child)
+            if type(child) not in _ATOMIC_TYPES:
+                stack.append(child)
+    return total
+
+
+def _current_rss():
+    """当前进程的常驻内存（字节）；拿不到（非 Linux）时返回 None。"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakMemory:
+    """
+    测量 with 块内的内存峰值：
+        python_peak：tracemalloc 统计的 Python 分配峰值（字节，精确）。
+        rss_peak：采样到的进程 RSS 峰值相对进入 with 时的增量（字节，取决于采样间隔；拿不到时为 None）。
+                  注意它包含 tracemalloc 自己的记账开销，会比真实值偏大。
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.python_peak = 0
+        self.rss_peak = None
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def _sample(self, baseline):
+        peak = baseline
+        while not self._stop.wait(self.interval):
+            peak = max(peak, _current_rss())
+        self.rss_peak = max(peak, _current_rss()) - baseline
+
+    def __enter__(self):
+        gc.collect()
+        baseline = _current_rss()
+        if baseline is not None:
+            self._sampler = threading.Thread(target=self._sample, args=(baseline,), daemon=True)
+            self._sampler.start()
+        tracemalloc.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.python_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+
+
+def measure_build(factory):
+    """调用 factory() 构建一个对象，返回 (对象, PeakMemory)。"""
+    with PeakMemory() as peak:
+        result = factory()
+    return result, peak
+
+
+def measure_pipeline(make_iterable):
+    """把 make_iterable() 返回的流水线完整消费一遍，不保留结果，返回 PeakMemory。"""
+    with PeakMemory() as peak:
+        deque(make_iterable(), maxlen=0)
+    return peak
+
+
+def _mb(num_bytes):
+    return "-" if num_bytes is None else f"{num_bytes / 1024 / 1024:.2f} MB"
+
+
+if __name__ == "__main__":
+    from comprehensions import test_comprehension, test_generator
+    from iterators_code_01 import EagerList
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"--- 内存实测 (n = {n}) ---")
+
+    eager, peak = measure_build(lambda: EagerList(n))
+    shallow = sys.getsizeof(eager.data)
+    deep = deep_sizeof(eager.data)
+    print(f"[EagerList.data] getsizeof 外壳: {_mb(shallow)}, 真实占用: {_mb(deep)} "
+          f"({deep / n:.1f} 字节/元素), 构建峰值: {_mb(peak.python_peak)} (RSS +{_mb(peak.rss_peak)})")
+    del eager
+
+    result, peak = measure_build(lambda: test_comprehension(range(n)))
+    deep = deep_sizeof(result)
+    print(f"[推导式结果] 真实占用: {_mb(deep)}, 构建峰值: {_mb(peak.python_peak)} (RSS +{_mb(peak.rss_peak)})")
+    del result
+
+    peak = measure_pipeline(lambda: test_generator(range(n)))
+    print(f"[生成器流水线] 消费全程峰值: {_mb(peak.python_peak)} (RSS +{_mb(peak.rss_peak)})")
+
+    per_element = deep / n
+    print(f"\n按 {per_element:.1f} 字节/元素估算：1000 万元素约 {_mb(per_element * 10**7)}，"
+          f"4GB 内存最多放约 {4 * 1024**3 / per_element / 1e6:.0f} 百万个元素（还没算解释器和其他数据）")
@@ -0,0 +1,186 @@
+"""
+流水线阶段：生产者和消费者之间放一个有界队列，让两边同时干活。
+
+comprehensions.py 的 main() 最后是 list(pipeline)：
+    1. 又把所有结果一次性装进内存，生成器省下的内存全还回去了；
+    2. 生成器是“拉”模式，消费者不来拉，生产者就停着；消费者在写数据库时，生产者也停着。两边永远轮流干活。
+
+BackgroundStage 把生产者放到后台线程（或进程）里跑，通过一个有界队列把结果交给消费者：
+    · 生产者不用等消费者来拉，可以提前把后面的数据算出来——两边在时间上重叠；
+    · 队列满了，生产者的 put 就阻塞，自动慢下来等消费者——这就是“背压（Backpressure）”，
+      内存上限 = 队列深度 maxsize × 每批条数 batch_size，和数据总量无关；
+    · 按批（batch_size 条一批）放进队列，而不是一条一条放，减少加锁（或进程间通信）的次数；
+    · 生产者抛出的异常会通过队列传给消费者，在消费者那边重新抛出。传的是“类型名、消息、traceback 文本”这几段纯数据，
+      在消费者那边包成 WorkerError——异常对象本身不一定能被 pickle 还原；
+    · 消费者取数据时不会无限期地等：每隔一小段时间看一眼生产者还活着没有，子进程意外死掉时抛 RuntimeError，而不是卡住；
+    · 遍历结束（或 close()）之后再遍历一次，直接结束，不会卡在一个再也不会有数据的队列上；
+    · 消费者提前退出（break / close / with 结束）时，通知生产者停下，不会留下卡在 put 上的后台线程。
+
+mode="thread" 适合生产者在等 I/O（或者消费者在等 I/O，比如写数据库）的场景；
+生产者是纯 Python 计算时受 GIL 限制，用 mode="process"，这时 producer 和参数都必须能被 pickle（定义在模块顶层）。
+"""
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+from itertools import islice
+
+_ITEMS, _ERROR, _DONE = "items", "error", "done"
+_POLL_SECONDS = 0.1  # 消费者等数据时，每隔这么久检查一次生产者是否还活着
+
+
+class WorkerError(Exception):
+    """
+    后台线程 / 子进程里的异常在消费者这边的替身：只带异常类型名、消息和 traceback 文本这几段纯数据。
+    原始异常对象不一定能被 pickle 还原（比如 __init__ 需要额外参数的自定义异常），所以不直接传它。
+    """
+    def __init__(self, type_name, message, traceback_text=""):
+        super().__init__(type_name, message, traceback_text)
+        self.type_name = type_name
+        self.message = message
+        self.traceback_text = traceback_text
+
+    def __str__(self):
+        if not self.traceback_text:
+            return self.message
+        return f"{self.type_name}: {self.message}\n\n生产者里的原始 traceback:\n{self.traceback_text}"
+
+
+def _put(q, stop, message):
+    """带退出检查的阻塞 put：队列满时每 0.1 秒看一眼消费者是不是已经不要了。"""
+    while not stop.is_set():
+        try:
+            q.put(message, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(q, stop, producer, args, batch_size):
+    """后台线程 / 子进程的入口：把 producer(*args) 的结果按批放进队列。"""
+    try:
+        iterator = iter(producer(*args))
+        while not stop.is_set():
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            if not _put(q, stop, (_ITEMS, batch)):
+                return
+    except Exception as e:
+        _put(q, stop, (_ERROR, (type(e).__name__, str(e), traceback.format_exc())))
+        return
+    _put(q, stop, (_DONE, None))
+
+
+class BackgroundStage:
+    """
+    在后台运行 producer(*args)，消费者像遍历普通可迭代对象一样遍历本对象。
+    例如：for row in BackgroundStage(safe_processor, data, maxsize=8): write_to_db(row)
+    """
+
+    def __init__(self, producer, *args, maxsize=16, batch_size=64, mode="thread"):
+        if mode == "thread":
+            self._queue = queue.Queue(maxsize)
+            self._stop = threading.Event()
+            self._worker = threading.Thread(target=_produce, daemon=True,
+                                            args=(self._queue, self._stop, producer, args, batch_size))
+        elif mode == "process":
+            self._queue = multiprocessing.Queue(maxsize)
+            self._stop = multiprocessing.Event()
+            self._worker = multiprocessing.Process(target=_produce, daemon=True,
+                                                   args=(self._queue, self._stop, producer, args, batch_size))
+        else:
+            raise ValueError(f"未知的 mode: {mode!r}，可选: 'thread', 'process'")
+        self._started = False
+        self._closed = False
+
+    def __iter__(self):
+        if self._closed:
+            # 已经遍历完（或被关掉）了：队列里再也不会有数据，直接结束
+            return
+        if not self._started:
+            self._started = True
+            self._worker.start()
+        try:
+            while True:
+                tag, payload = self._get()
+                if tag == _ITEMS:
+                    yield from payload
+                elif tag == _ERROR:
+                    raise WorkerError(*payload)
+                else:
+                    return
+        finally:
+            self.close()
+
+    def _get(self):
+        """带超时的 get：生产者没有留下结束标记就死掉了（比如子进程被杀），抛 RuntimeError 而不是一直等。"""
+        while True:
+            try:
+                return self._queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self._worker.is_alive():
+                    continue
+            # 生产者已经退出：它最后放进去的消息可能还在路上（子进程的队列缓冲），再等一次
+            try:
+                return self._queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                exitcode = getattr(self._worker, "exitcode", None)
+                raise RuntimeError(f"后台生产者意外退出（exitcode={exitcode}），没有发出结束标记") from None
+
+    def _drain(self):
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def close(self):
+        """通知生产者停下并等它退出；队列里剩下的数据直接丢弃。"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        if not self._started:
+            return
+        # 生产者可能正卡在 put 上（或者子进程的队列缓冲还没写完），边清空队列边等它退出
+        while self._worker.is_alive():
+            self._drain()
+            self._worker.join(timeout=0.05)
+        self._drain()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _slow_producer(n, delay):
+    """模拟一个每条数据都要等一会儿的生产者（比如逐条调用外部接口）。"""
+    for i in range(n):
+        time.sleep(delay)
+        yield i
+
+
+if __name__ == "__main__":
+    n, delay = 200, 0.002
+
+    def consume(rows):
+        # 模拟写数据库：每条也要等一会儿
+        count = 0
+        for _ in rows:
+            time.sleep(delay)
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    consume(_slow_producer(n, delay))
+    print(f"串行（生成器直连）: {time.perf_counter() - start:.2f}s")
+
+    for mode in ("thread", "process"):
+        start = time.perf_counter()
+        count = consume(BackgroundStage(_slow_producer, n, delay, maxsize=4, batch_size=8, mode=mode))
+        print(f"后台{mode}阶段:      {time.perf_counter() - start:.2f}s ({count} 条，生产和消费重叠)")
@@ -0,0 +1,148 @@
+"""
+切片与“切片视图”。
+
+list_basic.py 和 tuple_basic.py 里，取子序列、删除、修改都靠切片：
+    sub_list = my_list[1:3]
+    new_tuple = my_tuple[:i] + my_tuple[i + 1:]
+切片的语义是“复制”：my_list[a:b] 会新建一个列表，把 b - a 个指针拷过去（并给每个元素的引用计数 +1），
+时间和内存都是 O(b - a)。只是想读一读某个区间时，这份拷贝完全是浪费——
+比如在 100 万个元素上做长度 1000 的滑动窗口，每个窗口都复制 1000 个指针，一共复制 10 亿次。
+
+“视图”只记住“原序列 + 哪些下标”，不复制任何元素，创建是 O(1)：
+    · bytes / bytearray / array / NumPy 这类支持缓冲区协议的对象，标准库已经有现成的视图：memoryview。
+      memoryview(data)[a:b] 直接指向原来的内存，切片再切片也不复制；
+    · list / tuple 没有缓冲区（它们存的是指针，不是裸数据），这里用 SliceView 补上：
+      它把“哪些下标”存成一个 range 对象。range 本身就能切片，而且 range(n)[a:b:c][d:e] 会自动算出组合后的
+      start / stop / step，所以“视图的视图”永远直接指向最底层的原序列，不会一层套一层。
+
+view(seq, start, stop, step) 会自动选择：有缓冲区的用 memoryview，其余用 SliceView。
+
+注意：
+    · 视图是只读的，但它和原序列共享数据：原列表被修改后，视图里读到的也是新值（memoryview 也是这样）；
+      原列表变短后，越界的下标会在访问时抛 IndexError。
+    · 视图会让原序列一直活着（引用着它）。从 1GB 的列表里取 10 个元素的视图长期保存，不如直接复制出来。
+"""
+from collections.abc import Sequence
+
+
+class SliceView(Sequence):
+    """list / tuple（或任何支持下标的序列）上的 O(1) 只读窗口。"""
+
+    __slots__ = ("_base", "_range")
+
+    def __init__(self, base, start=None, stop=None, step=None):
+        if isinstance(base, SliceView):
+            # 视图的视图：把下标组合起来，直接指向最底层的序列
+            self._base = base._base
+            self._range = base._range[start:stop:step]
+        else:
+            self._base = base
+            self._range = range(len(base))[start:stop:step]
+
+    @classmethod
+    def _wrap(cls, base, index_range):
+        view = cls.__new__(cls)
+        view._base = base
+        view._range = index_range
+        return view
+
+    def __len__(self):
+        return len(self._range)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._wrap(self._base, self._range[index])
+        return self._base[self._range[index]]
+
+    def __iter__(self):
+        # 不用 islice(base, start, stop)：它要从头数过前 start 个元素，视图在长列表末尾时是 O(start)
+        return map(self._base.__getitem__, self._range)
+
+    def __reversed__(self):
+        return map(self._base.__getitem__, reversed(self._range))
+
+    def __contains__(self, value):
+        return any(x is value or x == value for x in self)
+
+    def count(self, value):
+        return sum(1 for x in self if x is value or x == value)
+
+    def __eq__(self, other):
+        if not isinstance(other, (SliceView, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # 和 list 一样不可哈希：原序列可能会变
+
+    def tolist(self):
+        """真正复制出来（这时才是 O(n)）。"""
+        return list(self)
+
+    def __repr__(self):
+        r = self._range
+        return f"SliceView({type(self._base).__name__}[{r.start}:{r.stop}:{r.step}], {self.tolist()!r})"
+
+
+def _has_buffer(obj):
+    try:
+        memoryview(obj)
+    except TypeError:
+        return False
+    return True
+
+
+def view(seq, start=None, stop=None, step=None):
+    """seq[start:stop:step] 的零拷贝版本：bytes 类用 memoryview，其余用 SliceView。"""
+    if isinstance(seq, memoryview):
+        return seq[start:stop:step]
+    if not isinstance(seq, SliceView) and _has_buffer(seq):
+        return memoryview(seq)[start:stop:step]
+    return SliceView(seq, start, stop, step)
+
+
+def sliding_windows(seq, size, step=1):
+    """按 step 滑动、长度为 size 的窗口，每个窗口都是视图（O(1) 创建），不复制元素。"""
+    if isinstance(seq, memoryview) or (not isinstance(seq, SliceView) and _has_buffer(seq)):
+        mv = memoryview(seq)
+        for start in range(0, len(mv) - size + 1, step):
+            yield mv[start:start + size]
+        return
+    # 直接构造下标 range，省掉 SliceView.__init__ 里的 len() 和一次 range 切片
+    base, indexes = (seq._base, seq._range) if isinstance(seq, SliceView) else (seq, range(len(seq)))
+    wrap = SliceView._wrap
+    for start in range(0, len(indexes) - size + 1, step):
+        yield wrap(base, indexes[start:start + size])
+
+
+if __name__ == "__main__":
+    import time
+
+    my_list = [10, 20, 30, 40, 50, 60, 70]
+    middle = view(my_list, 1, 6)
+    print(f"view(my_list, 1, 6) = {middle}")
+    print(f"视图的视图 middle[::2] = {middle[::2]}, 再倒过来 middle[::2][::-1] = {middle[::2][::-1]}")
+    my_list[3] = 99
+    print(f"改了原列表之后 middle = {middle.tolist()}（共享数据，没有复制）")
+    payload = b"HEADER|payload-bytes|FOOTER"
+    body = view(payload, 7, -7)
+    print(f"bytes 上的视图是 memoryview: {body!r} -> {body.tobytes()}")
+
+    n, size = 1_000_000, 1000
+    data = list(range(n))
+    blob = bytes(range(256)) * (n // 256)
+
+    def bench(label, windows):
+        start = time.perf_counter()
+        checksum = 0
+        for window in windows:
+            checksum += window[0] + window[-1]
+        print(f"{label:<36} {time.perf_counter() - start:.3f}s  checksum={checksum}")
+
+    print(f"\n--- 长度 {n} 的序列上，长度 {size} 的滑动窗口 ---")
+    bench("list 切片（每个窗口复制一次）", (data[i:i + size] for i in range(n - size + 1)))
+    bench("sliding_windows(list) -> SliceView", sliding_windows(data, size))
+    # bytes 的元素是裸字节，复制 1000 字节只是一次很快的 memcpy；窗口越大，memoryview 的优势越明显
+    big, step = 1 << 16, 64
+    print(f"\n--- {len(blob)} 字节上，长度 {big} 、步长 {step} 的滑动窗口 ---")
+    bench("bytes 切片（每个窗口复制一次）", (blob[i:i + big] for i in range(0, len(blob) - big + 1, step)))
+    bench("sliding_windows(bytes) -> memoryview", sliding_windows(blob, big, step))
@@ -0,0 +1,248 @@
+"""
+惰性流水线 Stream：comprehensions.py 第四步里 Django QuerySet 的思路，用在普通数据上。
+
+    Stream(range(10**8)).map(f).filter(p).batch(100).take(5)
+
+这一行什么都不算，只是记下一份“执行计划”（和 QuerySet 只拼 SQL 不查库一样），
+每次调用 map / filter 都返回一个新的 Stream，原来的不受影响，所以计划可以复用、可以分叉。
+只有在遍历（for / list / collect）时才真正执行。
+
+手写生成器流水线的问题是：每一步都是一个生成器，每个元素要穿过 N 层生成器，每层都有一次挂起/恢复。
+Stream 在执行前先做“算子融合”：把相邻的 map / filter 合成一个列表推导式，例如
+    map(f0).filter(p1).map(f2)  ==>  [v2 for v0 in chunk for v1 in (f0(v0),) if p1(v1) for v2 in (f2(v1),)]
+一个元素从头走到尾只经过一个循环。输入按 chunk_size 切块，融合后的函数一次处理一整块。
+
+同一份计划可以交给不同的后端执行：
+    "serial"     当前线程逐块执行；
+    "thread"     线程池并行处理各块，适合 f / p 里有 I/O（会释放 GIL）的情况；
+    "process"    进程池并行处理各块，适合纯计算；f / p 必须能被 pickle（定义在模块顶层，不能是 lambda）；
+    "vectorized" 每块转成 NumPy 数组，map 是整块运算、filter 是布尔掩码；f / p 只能是算术/比较表达式。
+                 没装 NumPy 时退回 "serial"。
+并行后端按输入顺序输出，同时在路上的块最多 workers * 2 个，内存恒定（调度代码在 chunking.py，和 comprehensions.py 的多进程版共用）。
+有 take 时，按块、并行执行也不会多算：在路上的输入加上已经产出的结果凑够 take 的数量，就不再读新的输入。
+"""
+import os
+import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+from comprehension_backends import np, plus_one  # np 可能是 None（没装 NumPy）
+from chunking import bounded_map, chunked
+
+BACKENDS = ("serial", "thread", "process", "vectorized")
+
+
+class _FusedStage:
+    """相邻的一串 map / filter，融合成一个处理整块数据的函数。可以被 pickle 发给子进程。"""
+
+    def __init__(self, ops):
+        self.ops = tuple(ops)
+        self._compiled = None
+
+    def _compile(self):
+        names = {}
+        clauses = ["for v0 in chunk"]
+        current = "v0"
+        for i, (kind, func) in enumerate(self.ops):
+            names[f"f{i}"] = func
+            if kind == "map":
+                clauses.append(f"for v{i + 1} in (f{i}({current}),)")
+                current = f"v{i + 1}"
+            else:
+                clauses.append(f"if f{i}({current})")
+        return eval(f"lambda chunk: [{current} {' '.join(clauses)}]", names)
+
+    def __call__(self, chunk):
+        if self._compiled is None:
+            self._compiled = self._compile()
+        return self._compiled(chunk)
+
+    def vectorized(self, chunk):
+        arr = np.asarray(chunk)
+        for kind, func in self.ops:
+            arr = func(arr) if kind == "map" else arr[func(arr)]
+        return arr.tolist()
+
+    def __getstate__(self):
+        # 编译出来的 lambda 不能 pickle，到子进程里再编译一次
+        return {"ops": self.ops, "_compiled": None}
+
+    def __repr__(self):
+        return "fused(" + " -> ".join(f"{kind} {getattr(func, '__name__', func)}" for kind, func in self.ops) + ")"
+
+
+def _run_fused(iterator, run_chunk, chunk_size, limit, executor, max_in_flight):
+    """
+    按块执行一个融合阶段。limit 是下游最多还要多少个输出（None 表示不限）。
+    每个输入最多产出一个输出，所以“已经产出的 + 还在路上的输入”凑够 limit 就不再读新的输入：
+    块的大小取 min(chunk_size, 剩余额度)，额度用完就先不提交，等在路上的块回来、看看 filter 滤掉了多少再说。
+    这样一个元素都不会多算：串行逐个处理要算的那些元素，这里也正好只算那些。
+    """
+    in_flight = deque()  # 已提交、结果还没被消费的块的大小
+    state = {"produced": 0, "in_flight": 0}
+
+    def next_chunk():
+        size = chunk_size
+        if limit is not None:
+            size = min(size, limit - state["produced"] - state["in_flight"])
+            if size <= 0:
+                return None
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return None
+        in_flight.append(len(chunk))
+        state["in_flight"] += len(chunk)
+        return chunk
+
+    if executor is None:
+        results = map(run_chunk, iter(next_chunk, None))
+    else:
+        results = bounded_map(executor, run_chunk, next_chunk, max_in_flight)
+    for result in results:
+        state["in_flight"] -= in_flight.popleft()
+        state["produced"] += len(result)
+        yield from result
+
+
+class Stream:
+    """惰性流水线：map / filter / batch / take 只记录计划，遍历时才执行。"""
+
+    def __init__(self, source, plan=()):
+        self._source = source
+        self._plan = tuple(plan)
+
+    def _then(self, op, arg):
+        return Stream(self._source, self._plan + ((op, arg),))
+
+    def map(self, func):
+        return self._then("map", func)
+
+    def filter(self, predicate):
+        return self._then("filter", predicate)
+
+    def batch(self, size):
+        """把元素按 size 个一组打包成 list。"""
+        return self._then("batch", size)
+
+    def take(self, count):
+        """
+        只要前 count 个；后面的数据根本不会被读取和计算。
+        执行时 take 的上限会往前推：前面只有 map 时源头只读 count 个；有 filter 时按剩余额度缩小块，
+        f / p 被调用的次数和逐个处理时一样，不会因为按块（或并行）执行而多算。
+        """
+        return self._then("take", count)
+
+    def stages(self, fuse=True):
+        """
+        融合后的执行计划：相邻的 map / filter 合成一个 _FusedStage。
+        fuse=False 时每个 map / filter 单独成一个阶段（每个元素要穿过 N 层），用来和融合版对比。
+        """
+        stages = []
+        for op, arg in self._plan:
+            if op in ("map", "filter"):
+                if fuse and stages and isinstance(stages[-1], _FusedStage):
+                    stages[-1] = _FusedStage(stages[-1].ops + ((op, arg),))
+                else:
+                    stages.append(_FusedStage([(op, arg)]))
+            else:
+                stages.append((op, arg))
+        return stages
+
+    def explain(self):
+        return " | ".join(repr(stage) if isinstance(stage, _FusedStage) else f"{stage[0]}({stage[1]})"
+                          for stage in self.stages())
+
+    def run(self, backend="serial", workers=None, chunk_size=4096, fuse=True):
+        """按计划执行，返回一个迭代器。fuse=False 关掉算子融合，只用来做对比。"""
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的 backend: {backend!r}，可选: {BACKENDS}")
+        if backend == "vectorized" and np is None:
+            warnings.warn("没有安装 NumPy，vectorized 退回 serial", RuntimeWarning, stacklevel=2)
+            backend = "serial"
+        return self._execute(backend, workers, chunk_size, fuse)
+
+    def _limits(self, stages):
+        """
+        从后往前推每个融合阶段最多需要产出多少个元素（None 表示不限），以及最多需要从源头读多少个。
+        take(n) 之前：最多 n 个；batch(k) 之前：下游要 n 批，就是 n * k 个；
+        只有 map 的阶段一个输入对应一个输出，需求原样往上传；带 filter 的阶段不知道要读多少个输入，往上就是不限。
+        """
+        limits = [None] * len(stages)
+        demand = None
+        for i in reversed(range(len(stages))):
+            stage = stages[i]
+            if isinstance(stage, _FusedStage):
+                limits[i] = demand
+                if any(kind == "filter" for kind, _ in stage.ops):
+                    demand = None
+            elif stage[0] == "batch":
+                if demand is not None:
+                    demand *= stage[1]
+            else:
+                demand = stage[1] if demand is None else min(demand, stage[1])
+        return limits, demand
+
+    def _execute(self, backend, workers, chunk_size, fuse):
+        executor = None
+        if backend == "thread":
+            executor = ThreadPoolExecutor(max_workers=workers)
+        elif backend == "process":
+            executor = ProcessPoolExecutor(max_workers=workers)
+        max_in_flight = (workers or os.cpu_count() or 1) * 2
+        try:
+            stages = self.stages(fuse)
+            limits, source_limit = self._limits(stages)
+            iterator = iter(self._source) if source_limit is None else islice(self._source, source_limit)
+            for stage, limit in zip(stages, limits):
+                if isinstance(stage, _FusedStage):
+                    run_chunk = stage.vectorized if backend == "vectorized" else stage
+                    iterator = _run_fused(iterator, run_chunk, chunk_size, limit, executor, max_in_flight)
+                elif stage[0] == "batch":
+                    iterator = chunked(iterator, stage[1])
+                else:
+                    iterator = islice(iterator, stage[1])
+            yield from iterator
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def __iter__(self):
+        return self.run()
+
+    def collect(self, backend="serial", workers=None, chunk_size=4096, fuse=True):
+        return list(self.run(backend, workers, chunk_size, fuse))
+
+
+def is_even(x):
+    return x % 2 == 0
+
+
+def triple(x):
+    return x * 3
+
+
+if __name__ == "__main__":
+    import time
+
+    n = 2_000_000
+    query = Stream(range(n)).map(plus_one).filter(is_even).map(triple)
+    print(f"执行计划: {query.explain()}")
+    print(f"只取前 3 批: {Stream(range(10**12)).map(plus_one).filter(is_even).batch(4).take(3).collect()}")
+
+    # 对照组：手写的三层生成器
+    start = time.perf_counter()
+    expected = list(triple(y) for y in (x for x in (plus_one(v) for v in range(n)) if is_even(x)))
+    print(f"{'三层生成器':<12} {time.perf_counter() - start:.3f}s")
+
+    # 算子融合本身值多少：同样按块、同样串行，只是每个 map / filter 单独一层
+    start = time.perf_counter()
+    result = query.collect("serial", chunk_size=50_000, fuse=False)
+    print(f"{'serial 不融合':<12} {time.perf_counter() - start:.3f}s  结果一致: {result == expected}")
+
+    for backend in ("serial", "thread", "process", "vectorized"):
+        start = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result = query.collect(backend, chunk_size=50_000)
+        print(f"{backend:<12} {time.perf_counter() - start:.3f}s  结果一致: {result == expected}")
@@ -0,0 +1,560 @@
+"""
+装饰器：不改函数本身，在函数外面包一层，给它加上新的行为。
+
+    @memoize(maxsize=1024)
+    def transform(x): ...
+
+等价于 transform = memoize(maxsize=1024)(transform)：调用 transform(x) 时，实际调用的是 memoize 返回的 wrapper，
+wrapper 决定要不要真的去调用原来的函数。functools.wraps 把原函数的 __name__、__doc__ 复制到 wrapper 上，
+原函数本身保存在 wrapper.__wrapped__ 里。
+
+--- 一、memoize：记住算过的结果 ---
+comprehensions.py 里的 risky_process 这类纯函数（同样的输入永远得到同样的输出），
+如果数据里有大量重复的 key，每个重复都重新算一遍就是纯浪费。memoize 用一个字典记住 参数 -> 结果：
+    · maxsize：最多记多少个结果，满了就淘汰“最久没被用过”的那个（LRU）。OrderedDict 可以 O(1) 地把
+      刚用过的 key 挪到末尾（move_to_end），淘汰时从开头弹出（popitem(last=False)）。maxsize=None 表示不限。
+    · ttl：结果最多保存多少秒，过期的在下次查询时丢掉重算。适合“一段时间内不变”的数据（比如配置、汇率）。
+      再也不会被查到的 key 也会过期：缓存大小每翻一倍，就顺手扫一遍清掉所有过期项；
+    · cache_exceptions：默认不缓存异常，失败了下次还会重试；
+      设成 True（或者一组异常类型）时做“负缓存”：记住这个输入会失败，下次直接抛出同样的异常，不再重算。
+      缓存里存的是不带 traceback 的副本，不会把出错时的栈帧和局部变量一直留在内存里。
+      坏数据反复出现、而且每次都注定失败时，负缓存能省下大量无用功。
+    · 每个函数都有自己的统计：命中 hits、未命中 misses、因为容量淘汰 evictions、因为过期丢掉 expirations。
+      wrapper.cache_info() 查看，wrapper.cache_clear() 清空；cache_report() 汇总所有被 memoize 的函数。
+
+和标准库 functools.lru_cache 的区别：lru_cache 是 C 实现，更快，但没有 TTL、不能缓存异常、统计只有 hits/misses。
+参数必须是可哈希的（和 lru_cache 一样），否则抛 TypeError。
+
+--- 二、instrument：不改函数体的计时 ---
+仓库里的计时都是手写的 start = time.time() ... end - start，每个地方写一遍，结果也散落各处。
+instrument 把它做成装饰器（timed 是对应的上下文管理器，给一段代码而不是一个函数计时），结果统一记到一个登记表里：
+    · 每个名字记录调用次数、总耗时，以及按 2 的幂分桶的耗时直方图（和 comprehensions.py 的 LatencyHistogram 一样），
+      能看出 p50 / p99，而不只是一个平均值；
+    · trace_memory=True 时用 tracemalloc 记录每次调用前后“还在用的内存”的变化（净分配），
+      tracemalloc 本身会让程序慢好几倍，所以默认关闭；
+    · 被装饰的是生成器函数时，调用它只是创建生成器，几乎不花时间；真正的工作在被消费时发生。
+      所以对生成器计的是“生成器自己在每次 next 里花的时间之和”，在生成器耗尽或被关闭时记一次；
+    · disable() 把模块、类上的计时版本直接换回原函数，关掉之后调用就是原函数本身，没有任何额外开销；
+      局部函数、或者调用方在 disable() 之前就拿走的引用换不掉，这些 wrapper 只多做一次全局变量判断；
+    · 开启时每次调用也不加锁：每个线程把统计记在自己的那一份里，report() 时再汇总；
+    · patch(模块, "函数名", ...) 把模块里的函数换成计时版本，不用改那些函数的源码，返回的函数用来换回去；
+    · report() 按总耗时从高到低打印登记表。
+"""
+import inspect
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import wraps
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "evictions", "expirations", "currsize", "maxsize"])
+
+_KWARGS_MARK = object()  # 分隔位置参数和关键字参数，避免 f(1, "a", 2) 和 f(1, a=2) 撞成同一个 key
+_memoized = []  # 所有被 memoize 装饰过的函数，给 cache_report() 用
+
+
+def _make_key(args, kwargs):
+    if not kwargs:
+        return args[0] if len(args) == 1 and type(args[0]) in (int, str) else args
+    return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+
+
+def _detached(exc):
+    """
+    异常的一份副本：类型、args 和属性都一样，但不带 __traceback__（也不带 __cause__ / __context__）。
+    缓存原来的异常对象会通过 traceback 把出错时的每一层栈帧和局部变量都留在内存里，直到缓存被清掉。
+    不调用 __init__，所以 __init__ 需要额外参数的自定义异常也能复制。
+    """
+    clone = type(exc).__new__(type(exc), *exc.args)
+    clone.args = exc.args
+    if hasattr(exc, "__dict__"):
+        clone.__dict__.update(exc.__dict__)
+    return clone
+
+
+def memoize(maxsize=128, ttl=None, cache_exceptions=False):
+    """带 LRU 容量上限和 TTL 过期的缓存装饰器。"""
+    if cache_exceptions is True:
+        cache_exceptions = (Exception,)
+    elif not cache_exceptions:
+        cache_exceptions = ()
+
+    def decorator(func):
+        cache = OrderedDict()  # key -> (是否成功, 结果或异常, 过期时刻)
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        lock = threading.Lock()
+        sweep_at = [64]  # 缓存长到这么大时扫一遍过期项
+
+        def sweep(now):
+            """
+            清掉所有过期项。过期项平时只在同一个 key 再被查到时才删，从此不再被查的 key 会一直占着位置；
+            maxsize=None 时缓存就会无限增长。每次缓存大小翻倍才扫一遍，摊到每次插入上是 O(1)。
+            """
+            expired = [key for key, entry in cache.items() if entry[2] <= now]
+            for key in expired:
+                del cache[key]
+            stats["expirations"] += len(expired)
+            sweep_at[0] = max(2 * len(cache), 64)
+
+        def store(key, ok, value):
+            now = time.monotonic()
+            expires = now + ttl if ttl is not None else None
+            with lock:
+                cache[key] = (ok, value, expires)
+                cache.move_to_end(key)
+                if maxsize is not None and len(cache) > maxsize:
+                    cache.popitem(last=False)
+                    stats["evictions"] += 1
+                if ttl is not None and len(cache) >= sweep_at[0]:
+                    sweep(now)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                    del cache[key]
+                    stats["expirations"] += 1
+                    entry = None
+                if entry is not None:
+                    stats["hits"] += 1
+                    cache.move_to_end(key)
+                else:
+                    stats["misses"] += 1
+            if entry is not None:
+                ok, value, _ = entry
+                if ok:
+                    return value
+                # 每次抛一个新副本：缓存里那份永远不挂 traceback，多个线程也不会共用同一个异常对象
+                raise _detached(value)
+
+            # 真正的计算放在锁外面：慢函数不会把其他线程的缓存命中也堵住
+            try:
+                result = func(*args, **kwargs)
+            except cache_exceptions as e:
+                store(key, False, _detached(e))
+                raise
+            store(key, True, result)
+            return result
+
+        def cache_info():
+            with lock:
+                return CacheInfo(currsize=len(cache), maxsize=maxsize, **stats)
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                stats.update(dict.fromkeys(stats, 0))
+                sweep_at[0] = 64
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        _memoized.append(wrapper)
+        return wrapper
+
+    return decorator
+
+
+def cache_report():
+    """所有被 memoize 的函数的命中统计，一行一个。"""
+    lines = []
+    for wrapper in _memoized:
+        info = wrapper.cache_info()
+        total = info.hits + info.misses
+        hit_rate = info.hits / total if total else 0.0
+        lines.append(f"{wrapper.__qualname__:<24} 命中率 {hit_rate:6.1%}  hits={info.hits} misses={info.misses} "
+                     f"evictions={info.evictions} expirations={info.expirations} size={info.currsize}/{info.maxsize}")
+    return "\n".join(lines)
+
+
+_enabled = True
+_registry = {}  # 名字 -> CallStats
+_registry_lock = threading.Lock()
+_sites = []  # 所有被 instrument 过、能找到绑定位置的函数，disable() / enable() 时换来换去
+
+
+class _Site:
+    """一个被换成计时版本的函数：原函数、计时版本，以及它绑定在哪个对象（模块或类）的哪个属性上。"""
+
+    __slots__ = ("func", "wrapper", "owner", "attr", "swapped")
+
+    def __init__(self, func, wrapper, owner=None, attr=None):
+        self.func = func
+        self.wrapper = wrapper
+        self.owner = owner
+        self.attr = attr
+        self.swapped = False  # disable() 是否把属性换回了原函数
+
+    def locate(self):
+        """装饰器写法在装饰时还没赋值给模块属性，所以到用的时候才按 __module__ / __qualname__ 去找。"""
+        if self.owner is None:
+            owner = sys.modules.get(self.func.__module__)
+            *path, self.attr = self.func.__qualname__.split(".")
+            for part in path:
+                owner = getattr(owner, part, None)
+            self.owner = owner
+        return self.owner, self.attr
+
+
+def enable():
+    global _enabled
+    _enabled = True
+    for site in _sites:
+        owner, attr = site.locate()
+        if site.swapped and vars(owner).get(attr) is site.func:
+            setattr(owner, attr, site.wrapper)
+        site.swapped = False
+
+
+def disable():
+    """
+    关闭所有计时：把模块、类上的计时版本换回原函数，调用时完全没有额外开销。
+    换不掉的（局部函数、调用方早就拿走的引用）仍然是 wrapper，只多一次全局变量判断。
+    """
+    global _enabled
+    _enabled = False
+    for site in _sites:
+        owner, attr = site.locate()
+        if owner is not None and vars(owner).get(attr) is site.wrapper:
+            setattr(owner, attr, site.func)
+            site.swapped = True
+
+
+class _Shard:
+    """一个线程自己的那份统计，只有这个线程会写，所以不用加锁。"""
+
+    __slots__ = ("calls", "total_ns", "buckets", "alloc_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.buckets = [0] * 64  # 第 i 个桶：耗时在 [2^(i-1), 2^i) 纳秒
+        self.alloc_bytes = 0
+
+
+class CallStats:
+    """
+    一个名字的统计：调用次数、总耗时、log2 耗时直方图、净内存分配。
+    每个线程写自己的 _Shard（每次调用都加锁太贵），读的时候再把所有线程的加起来。
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _new_shard(self):
+        shard = self._local.shard = _Shard()
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def record(self, elapsed_ns, alloc_bytes=0):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard.calls += 1
+        shard.total_ns += elapsed_ns
+        shard.buckets[min(elapsed_ns.bit_length(), 63)] += 1
+        shard.alloc_bytes += alloc_bytes
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.calls = 0
+                shard.total_ns = 0
+                shard.buckets[:] = [0] * 64
+                shard.alloc_bytes = 0
+
+    @property
+    def calls(self):
+        return sum(shard.calls for shard in self._shards)
+
+    @property
+    def total_ns(self):
+        return sum(shard.total_ns for shard in self._shards)
+
+    @property
+    def alloc_bytes(self):
+        return sum(shard.alloc_bytes for shard in self._shards)
+
+    @property
+    def buckets(self):
+        return [sum(column) for column in zip(*(shard.buckets for shard in self._shards))] or [0] * 64
+
+    def percentile(self, p):
+        """近似的 p 分位数（纳秒），精度是 2 倍以内：返回所在桶的上界。"""
+        buckets = self.buckets
+        target = sum(buckets) * p / 100
+        seen = 0
+        for i, count in enumerate(buckets):
+            seen += count
+            if count and seen >= target:
+                return 1 << i
+        return 0
+
+
+def get_stats(name):
+    stats = _registry.get(name)
+    if stats is None:
+        with _registry_lock:
+            stats = _registry.setdefault(name, CallStats(name))
+    return stats
+
+
+_tracing = {"depth": 0, "owned": False}  # 正在做内存统计的调用有几层；tracemalloc 是不是我们打开的
+
+
+def _memory_start():
+    """开始一次内存统计，返回当前已分配的字节数。tracemalloc 没开就临时打开。"""
+    with _registry_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing["owned"] = True
+        _tracing["depth"] += 1
+    return tracemalloc.get_traced_memory()[0]
+
+
+def _memory_stop(before):
+    """结束一次内存统计，返回净分配字节数。最外层结束时关掉我们自己打开的 tracemalloc，不拖慢后面的代码。"""
+    delta = tracemalloc.get_traced_memory()[0] - before
+    with _registry_lock:
+        _tracing["depth"] -= 1
+        if _tracing["depth"] == 0 and _tracing["owned"]:
+            tracemalloc.stop()
+            _tracing["owned"] = False
+    return delta
+
+
+def _instrument_generator(func, stats, trace_memory):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return (yield from func(*args, **kwargs))
+        before = _memory_start() if trace_memory else 0
+        elapsed = 0
+        gen = func(*args, **kwargs)
+        try:
+            while True:
+                start = time.perf_counter_ns()
+                try:
+                    item = next(gen)
+                except StopIteration as stop:
+                    elapsed += time.perf_counter_ns() - start
+                    return stop.value
+                elapsed += time.perf_counter_ns() - start
+                yield item
+        finally:
+            gen.close()
+            stats.record(elapsed, _memory_stop(before) if trace_memory else 0)
+    return wrapper
+
+
+def _instrument(func, name, trace_memory):
+    stats = get_stats(name or f"{func.__module__}.{func.__qualname__}")
+    if inspect.isgeneratorfunction(func):
+        return _instrument_generator(func, stats, trace_memory)
+    record = stats.record
+    clock = time.perf_counter_ns
+
+    if trace_memory:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            before = _memory_start()
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                record(elapsed, _memory_stop(before))
+    else:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(clock() - start)
+    return wrapper
+
+
+def instrument(func=None, *, name=None, trace_memory=False):
+    """计时装饰器，@instrument 和 @instrument(name=..., trace_memory=True) 两种写法都可以。"""
+    if func is None:
+        return lambda f: instrument(f, name=name, trace_memory=trace_memory)
+    wrapper = _instrument(func, name, trace_memory)
+    if "<locals>" not in func.__qualname__:
+        # 能按名字找到的函数登记下来，disable() 时直接换回原函数
+        _sites.append(_Site(func, wrapper))
+    return wrapper
+
+
+@contextmanager
+def timed(name, trace_memory=False):
+    """给一段代码计时：with timed("load"): ..."""
+    if not _enabled:
+        yield
+        return
+    before = _memory_start() if trace_memory else 0
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter_ns() - start
+        get_stats(name).record(elapsed, _memory_stop(before) if trace_memory else 0)
+
+
+def patch(target, *names, trace_memory=False):
+    """把 target（模块或类）上的这些函数换成 instrument 过的版本，返回一个换回原函数的 unpatch()。"""
+    originals = {name: getattr(target, name) for name in names}
+    prefix = getattr(target, "__name__", type(target).__name__)
+    sites = []
+    for name, func in originals.items():
+        wrapper = _instrument(func, f"{prefix}.{name}", trace_memory)
+        sites.append(_Site(func, wrapper, target, name))
+        setattr(target, name, func if not _enabled else wrapper)
+        sites[-1].swapped = not _enabled
+    _sites.extend(sites)
+
+    def unpatch():
+        for site in sites:
+            _sites.remove(site)
+        for name, func in originals.items():
+            setattr(target, name, func)
+    return unpatch
+
+
+def reset():
+    """
+    把所有计时项清零。原地清零而不是清空登记表：已经装饰好的函数在装饰时就拿住了自己的 CallStats，
+    换成新对象的话，它们之后的调用都会记到没人看得见的旧对象上。
+    """
+    with _registry_lock:
+        for stats in _registry.values():
+            stats.reset()
+
+
+def _format_ns(ns):
+    for unit, scale in (("s", 10**9), ("ms", 10**6), ("µs", 10**3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f}{unit}"
+    return f"{ns}ns"
+
+
+def report():
+    """按总耗时从高到低列出所有计时项。"""
+    rows = sorted(_registry.values(), key=lambda s: s.total_ns, reverse=True)
+    lines = [f"{'name':<40} {'calls':>8} {'total':>10} {'mean':>10} {'p50':>10} {'p99':>10} {'alloc':>12}"]
+    for s in rows:
+        if not s.calls:
+            continue
+        lines.append(f"{s.name:<40} {s.calls:>8} {_format_ns(s.total_ns):>10} {_format_ns(s.total_ns // s.calls):>10} "
+                     f"{'<' + _format_ns(s.percentile(50)):>10} {'<' + _format_ns(s.percentile(99)):>10} "
+                     f"{s.alloc_bytes:>12,}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import os
+    import random
+
+    def risky_transform(x):
+        """确定性版本的 risky_process：同样的 x 总是得到同样的结果（或者同样的异常），还有点计算量。"""
+        if x % 10 == 0:
+            raise ValueError(f"Bad Data: {x}")
+        return sum(i * x for i in range(200))
+
+    def make_keys(n, repeat_rate, seed=42):
+        """生成 n 个 key，其中约 repeat_rate 的比例是之前出现过的 key。"""
+        rng = random.Random(seed)
+        seen = []
+        keys = []
+        for _ in range(n):
+            if seen and rng.random() < repeat_rate:
+                keys.append(rng.choice(seen))
+            else:
+                seen.append(len(seen))
+                keys.append(seen[-1])
+        return keys
+
+    def run(transform, keys):
+        results = []
+        for k in keys:
+            try:
+                results.append(transform(k))
+            except ValueError:
+                pass
+        return results
+
+    keys = make_keys(200_000, repeat_rate=0.7)
+    print(f"{len(keys)} 次调用, 不同的 key {len(set(keys))} 个")
+
+    start = time.perf_counter()
+    expected = run(risky_transform, keys)
+    print(f"{'不缓存':<28} {time.perf_counter() - start:.3f}s")
+
+    variants = {
+        "memoize(maxsize=None)": memoize(maxsize=None)(risky_transform),
+        "memoize(maxsize=None, 负缓存)": memoize(maxsize=None, cache_exceptions=ValueError)(risky_transform),
+        "memoize(maxsize=10_000)": memoize(maxsize=10_000)(risky_transform),
+        "memoize(ttl=0.05)": memoize(maxsize=None, ttl=0.05)(risky_transform),
+    }
+    for label, transform in variants.items():
+        start = time.perf_counter()
+        result = run(transform, keys)
+        info = transform.cache_info()
+        print(f"{label:<28} {time.perf_counter() - start:.3f}s  结果一致: {result == expected}  "
+              f"命中率 {info.hits / (info.hits + info.misses):.1%}  {info}")
+
+    # --- 二、instrument ---
+    print("\n--- instrument: 不改源码，给 comprehensions.py 里的函数计时 ---")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "02_pythonic"))
+    import comprehensions
+
+    unpatch = patch(comprehensions, "test_for_loop", "test_comprehension", "safe_processor", "risky_process")
+    patch(comprehensions, "test_generator", trace_memory=True)
+    for _ in range(5):
+        comprehensions.test_for_loop(range(10**6))
+        comprehensions.test_comprehension(range(10**6))
+        comprehensions.test_generator(range(10**6))
+    # safe_processor 是生成器函数：计的是它被消费掉的这段时间；它内部调用的 risky_process 也被换成了计时版本
+    sum(1 for _ in comprehensions.safe_processor(range(10**5)))
+    with timed("sum(range(10**7))"):
+        sum(range(10**7))
+    print(report())
+    unpatch()
+
+    def noop(x):
+        return x
+
+    def cost_per_call(n=10**6):
+        # 每次调用都按名字查 noop：disable() 换回原函数之后，这里调用的就是原函数本身
+        start = time.perf_counter_ns()
+        for i in range(n):
+            noop(i)
+        return (time.perf_counter_ns() - start) / n
+
+    raw = cost_per_call()
+    noop = instrument(noop)  # 等价于在 def noop 上面写 @instrument
+    print(f"\n空函数每次调用: 原函数 {raw:.0f}ns, 计时开启 {cost_per_call():.0f}ns", end="")
+    disable()
+    print(f", disable() 之后 {cost_per_call():.0f}ns", end="")
+    enable()
+    print(f", 重新 enable() {cost_per_call():.0f}ns（已记录 {get_stats('__main__.noop').calls} 次）")
+
+    # reset() 之后，已经装饰好的函数照样记到同一个登记项上
+    reset()
+    assert get_stats("__main__.noop").calls == 0 and get_stats("__main__.noop").percentile(50) == 0
+    for i in range(3):
+        noop(i)
+    assert get_stats("__main__.noop").calls == 3 and "__main__.noop" in report()
+    print(f"reset() 之后再调用 3 次: calls = {get_stats('__main__.noop').calls}")